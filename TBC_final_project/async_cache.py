@@ -0,0 +1,105 @@
+"""
+Async Redis cache client used by the ASGI read views.
+
+django_redis only exposes a blocking client (its ``aget``/``aset`` run the sync client in a thread),
+so the async views talk to the same Redis database through ``redis.asyncio`` instead.
+Values are stored as JSON so they are cheap to decode and readable from redis-cli.
+"""
+import asyncio
+import json
+import logging
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from redis.exceptions import RedisError
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# redis.asyncio connections are bound to the event loop that opened them, so keep one client per loop.
+_clients = weakref.WeakKeyDictionary()
+_sync_client = None
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = aioredis.from_url(settings.ASYNC_CACHE_LOCATION)
+        _clients[loop] = client
+    return client
+
+
+def get_sync_client():
+    """
+    A blocking client on the same database, for sync code (signal handlers) that drops entries.
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.ASYNC_CACHE_LOCATION)
+    return _sync_client
+
+
+def make_key(key):
+    return f"{settings.ASYNC_CACHE_KEY_PREFIX}:{key}"
+
+
+async def get_json(key):
+    """
+    Return the cached JSON value for ``key`` or None on a miss (or when Redis is unreachable).
+    """
+    try:
+        raw = await get_client().get(make_key(key))
+    except (RedisError, OSError) as exc:
+        logger.warning("async cache get failed", extra={'key': key, 'error': str(exc)})
+        metrics.record_cache(hit=False)
+        return None
+    metrics.record_cache(hit=raw is not None)
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+async def set_json(key, value, timeout=None):
+    """
+    Store ``value`` as JSON under ``key``; failures are logged and ignored.
+    """
+    if timeout is None:
+        timeout = settings.CACHES['default'].get('TIMEOUT', 60)
+    try:
+        await get_client().set(make_key(key), json.dumps(value, cls=DjangoJSONEncoder), ex=timeout)
+    except (RedisError, OSError) as exc:
+        logger.warning("async cache set failed", extra={'key': key, 'error': str(exc)})
+
+
+def delete(*keys):
+    """
+    Drop ``keys`` from sync code; failures are logged and ignored, the entries then expire on their own.
+    """
+    try:
+        get_sync_client().delete(*(make_key(key) for key in keys))
+    except (RedisError, OSError) as exc:
+        logger.warning("async cache delete failed", extra={'keys': keys, 'error': str(exc)})
+
+
+def delete_matching(pattern, batch_size=500):
+    """
+    Drop every key matching the glob ``pattern`` from sync code, SCANning rather than blocking Redis
+    with KEYS. Failures are logged and ignored like delete()'s.
+    """
+    client = get_sync_client()
+    try:
+        batch = []
+        for key in client.scan_iter(match=make_key(pattern), count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                client.delete(*batch)
+                batch = []
+        if batch:
+            client.delete(*batch)
+    except (RedisError, OSError) as exc:
+        logger.warning("async cache delete failed", extra={'pattern': pattern, 'error': str(exc)})
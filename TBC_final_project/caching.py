@@ -0,0 +1,170 @@
+"""
+Stampede-protected caching on top of the default (django_redis) cache.
+
+``get_or_build`` stores each value with a soft expiry ("fresh until") inside a longer hard TTL.
+Once the soft expiry passes, the first request to take the rebuild lock (a ``cache.add``, i.e.
+Redis SET NX) recomputes the value; every concurrent request keeps getting the stale copy instead
+of running the same query. Soft expiries are jittered so entries written together don't all expire
+in the same second. Hits, misses and stale serves are counted in the request metrics.
+
+``TwoTierCache`` adds a per-process LRU in front of the shared cache for reference data.
+"""
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# How long an expired value may still be served while one request rebuilds it.
+STALE_TTL = 300
+# Soft expiries are spread over +/- this fraction of the timeout.
+JITTER = 0.1
+# A rebuild that takes longer than this loses the lock to the next request.
+LOCK_TIMEOUT = 30
+# On a cold miss with a rebuild already running, wait this long for it before building anyway.
+COLD_WAIT = 2.0
+COLD_POLL_INTERVAL = 0.05
+
+
+def jittered(timeout, jitter=JITTER):
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def lock_key(key):
+    return f"{key}:lock"
+
+
+def store(key, value, timeout, stale_ttl=STALE_TTL):
+    """
+    Cache ``value`` as fresh for about ``timeout`` seconds, then servable-while-stale for ``stale_ttl``.
+    """
+    fresh_for = jittered(timeout)
+    cache.set(key, {'value': value, 'fresh_until': time.time() + fresh_for}, timeout=int(fresh_for + stale_ttl))
+
+
+def rebuild(key, build, timeout, stale_ttl, token):
+    try:
+        value = build()
+        store(key, value, timeout, stale_ttl)
+        return value
+    finally:
+        # Only release our own lock; if the rebuild overran LOCK_TIMEOUT another request owns it now.
+        if cache.get(lock_key(key)) == token:
+            cache.delete(lock_key(key))
+
+
+def get_or_build(key, build, timeout=60, stale_ttl=STALE_TTL):
+    """
+    Return the cached value for ``key``, calling ``build()`` to (re)compute it at most once at a time.
+    """
+    entry = cache.get(key)
+    if entry is not None and time.time() < entry['fresh_until']:
+        metrics.record_cache(hit=True)
+        return entry['value']
+
+    token = uuid.uuid4().hex
+    if cache.add(lock_key(key), token, timeout=LOCK_TIMEOUT):
+        metrics.record_cache(hit=False)
+        return rebuild(key, build, timeout, stale_ttl, token)
+
+    if entry is not None:
+        metrics.record_cache(hit=True, stale=True)
+        return entry['value']
+
+    # Nothing cached yet and another request is building it: its result is usually moments away.
+    deadline = time.monotonic() + COLD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            metrics.record_cache(hit=True)
+            return entry['value']
+
+    logger.warning("cache rebuild still running, building without the lock", extra={'key': key})
+    metrics.record_cache(hit=False)
+    return build()
+
+
+class TwoTierCache:
+    """
+    A bounded in-process LRU in front of the shared cache, for small, rarely changing data.
+
+    Invalidation is a version number kept in the shared cache: ``invalidate()`` bumps it, which
+    orphans every shared entry (their keys embed the version) and, within ``version_check_interval``
+    seconds, every worker's local entries too. Between checks a read is a dict lookup.
+    """
+
+    def __init__(self, namespace, maxsize=512, timeout=3600, version_check_interval=2.0):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.version_check_interval = version_check_interval
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.version = None
+        self.version_checked_at = 0.0
+
+    @property
+    def version_key(self):
+        return f"{self.namespace}:version"
+
+    def current_version(self):
+        now = time.monotonic()
+        if self.version is not None and now - self.version_checked_at < self.version_check_interval:
+            return self.version
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, timeout=None)
+            version = cache.get(self.version_key, 1)
+        with self.lock:
+            if version != self.version:
+                self.local.clear()
+                self.version = version
+            self.version_checked_at = now
+        return version
+
+    def get_or_build(self, key, build):
+        version = self.current_version()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(key)
+            # Entries carry their version, so a build that raced an invalidation is never served locally.
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self.local.move_to_end(key)
+                metrics.record_cache(hit=True)
+                return entry[2]
+
+        shared_key = f"{self.namespace}:v{version}:{key}"
+        value = cache.get(shared_key)
+        metrics.record_cache(hit=value is not None)
+        if value is None:
+            value = build()
+            cache.set(shared_key, value, timeout=self.timeout)
+
+        with self.lock:
+            self.local[key] = (version, now + jittered(self.timeout), value)
+            self.local.move_to_end(key)
+            while len(self.local) > self.maxsize:
+                self.local.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # No version yet (or it was evicted): any fresh value differs from what workers hold.
+            cache.set(self.version_key, int(time.time()), timeout=None)
+        with self.lock:
+            self.local.clear()
+            self.version = None
+
+
+# Categories and tags: read on most requests, edited by hand.
+reference_data = TwoTierCache('refdata')
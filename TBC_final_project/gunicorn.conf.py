@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for production: ``gunicorn -c TBC_final_project/gunicorn.conf.py TBC_final_project.asgi:application``.
+
+The ASGI app runs in Uvicorn workers (the async views and the SSE endpoint need an event loop), one per
+available core by default. The app, its URLconf and views are imported once in the master and shared
+with the forked workers copy-on-write, so a worker is ready to serve as soon as it forks. Migrations are
+not run here; they are a separate step (the ``migrate`` service in docker-compose.yml).
+"""
+import os
+
+
+def available_cpus():
+    # Respect container CPU pinning where the platform exposes it.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cpus()))
+preload_app = True
+
+# Recycle workers now and then so slow leaks can't accumulate; jitter keeps them from restarting together.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+# SSE streams stay open far longer than this; Uvicorn workers heartbeat independently of requests.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Import the URLconf (and with it every view, serializer and task module) before forking,
+    # instead of in each worker on its first request.
+    if not server.cfg.preload_app:
+        return
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    # Connections must never be shared across processes; each worker opens its own.
+    from django.db import connections
+
+    connections.close_all()
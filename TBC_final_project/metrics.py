@@ -0,0 +1,279 @@
+"""
+Per-request performance metrics.
+
+PerformanceMiddleware opens a RequestMetrics collector for every request and stores it in a context
+variable. Database queries (through a connection execute wrapper), cache lookups (through
+record_cache), serializers (through a wrapper around ``BaseSerializer.data``) and response rendering
+add to it, and when the response is finished the totals are folded into per-view histograms that
+``metrics_view`` exposes in the Prometheus text format.
+
+Histograms live in process memory, so each worker exposes its own series. The endpoint is served to
+staff users and to scrapers sending ``Authorization: Bearer <METRICS_TOKEN>``.
+"""
+import contextvars
+import functools
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# How many recent samples per view feed the rolling quantiles.
+ROLLING_WINDOW = 1024
+QUANTILES = (0.5, 0.9, 0.99)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Counters for a single request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_stale = 0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+
+    def server_timing(self, total):
+        """
+        Value for the ``Server-Timing`` response header (durations in milliseconds).
+        """
+        return ', '.join([
+            f'db;dur={self.query_time * 1000:.2f};desc="{self.query_count} queries"',
+            f'cache;desc="{self.cache_hits} hit, {self.cache_misses} miss, {self.cache_stale} stale"',
+            f'serialize;dur={self.serialize_time * 1000:.2f}',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_cache(hit, stale=False):
+    """
+    Count a cache lookup against the current request (no-op outside a request).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if stale:
+        metrics.cache_stale += 1
+    elif hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Database execute wrapper that adds every query to the current request's counters.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.query_count += 1
+        metrics.query_time += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver: wrap every new connection, whichever thread opened it.
+    Async views run their queries in worker threads, so a per-request wrapper would miss them.
+    """
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def timed_data(data):
+    """
+    Wrap the ``data`` property getter so building the primitive representation counts as serialize
+    time. A ``.data`` read inside another one (a serializer used by a method field) is counted once.
+    """
+    @functools.wraps(data)
+    def wrapper(serializer):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return data(serializer)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            metrics.serialize_time += time.perf_counter() - started
+            metrics.serializing = False
+
+    wrapper.timed = True
+    return wrapper
+
+
+def install_serializer_timer():
+    """
+    Time every DRF serializer: Serializer.data and ListSerializer.data both go through BaseSerializer.data.
+    """
+    if not getattr(BaseSerializer.data.fget, 'timed', False):
+        BaseSerializer.data = property(timed_data(BaseSerializer.data.fget))
+
+
+class Histogram:
+    """
+    Cumulative bucketed histogram plus a rolling window of recent samples for quantiles.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=ROLLING_WINDOW)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self):
+        samples = sorted(self.recent)
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: samples[min(int(q * len(samples)), len(samples) - 1)] for q in QUANTILES}
+
+
+class Registry:
+    """
+    Per-view histograms and counters for this process.
+    """
+    HISTOGRAMS = (
+        ('request_duration_seconds', "Total time spent handling the request."),
+        ('db_duration_seconds', "Time spent in SQL queries per request."),
+        ('serialize_duration_seconds', "Time spent in serializers building the response data."),
+        ('render_duration_seconds', "Time spent encoding the response body (JSON / MessagePack)."),
+    )
+    COUNTERS = (
+        ('requests_total', "Requests handled."),
+        ('db_queries_total', "SQL queries executed."),
+        ('cache_hits_total', "Cache lookups that hit."),
+        ('cache_misses_total', "Cache lookups that missed."),
+        ('cache_stale_total', "Cache lookups served a stale value while it was refreshed."),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(lambda: {name: Histogram() for name, _ in self.HISTOGRAMS})
+        self.counters = defaultdict(lambda: dict.fromkeys((name for name, _ in self.COUNTERS), 0))
+        self.gauges = {}
+
+    def observe(self, view, metrics, total):
+        with self.lock:
+            histograms = self.histograms[view]
+            histograms['request_duration_seconds'].observe(total)
+            histograms['db_duration_seconds'].observe(metrics.query_time)
+            histograms['serialize_duration_seconds'].observe(metrics.serialize_time)
+            histograms['render_duration_seconds'].observe(metrics.render_time)
+            counters = self.counters[view]
+            counters['requests_total'] += 1
+            counters['db_queries_total'] += metrics.query_count
+            counters['cache_hits_total'] += metrics.cache_hits
+            counters['cache_misses_total'] += metrics.cache_misses
+            counters['cache_stale_total'] += metrics.cache_stale
+
+    def register_gauge(self, name, help_text, func):
+        """
+        Register a callable evaluated at scrape time, e.g. a queue depth.
+        """
+        self.gauges[name] = (help_text, func)
+
+    def render(self, prefix='tbc'):
+        lines = []
+        with self.lock:
+            for name, help_text in self.COUNTERS:
+                lines.append(f'# HELP {prefix}_{name} {help_text}')
+                lines.append(f'# TYPE {prefix}_{name} counter')
+                for view, counters in sorted(self.counters.items()):
+                    lines.append(f'{prefix}_{name}{{view="{view}"}} {counters[name]}')
+
+            for name, help_text in self.HISTOGRAMS:
+                lines.append(f'# HELP {prefix}_{name} {help_text}')
+                lines.append(f'# TYPE {prefix}_{name} histogram')
+                for view, histograms in sorted(self.histograms.items()):
+                    histogram = histograms[name]
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{prefix}_{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{prefix}_{name}_bucket{{view="{view}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{prefix}_{name}_sum{{view="{view}"}} {histogram.sum:.6f}')
+                    lines.append(f'{prefix}_{name}_count{{view="{view}"}} {histogram.count}')
+
+                # Quantiles over the last ROLLING_WINDOW requests, so regressions show up without a rate() query.
+                lines.append(f'# HELP {prefix}_{name}_recent {help_text} (rolling window)')
+                lines.append(f'# TYPE {prefix}_{name}_recent summary')
+                for view, histograms in sorted(self.histograms.items()):
+                    histogram = histograms[name]
+                    for q, value in histogram.quantiles().items():
+                        lines.append(f'{prefix}_{name}_recent{{view="{view}",quantile="{q}"}} {value:.6f}')
+                    lines.append(f'{prefix}_{name}_recent_sum{{view="{view}"}} {sum(histogram.recent):.6f}')
+                    lines.append(f'{prefix}_{name}_recent_count{{view="{view}"}} {len(histogram.recent)}')
+
+        for name, (help_text, func) in sorted(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                logger.exception("metrics gauge failed", extra={'gauge': name})
+                continue
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} gauge')
+            lines.append(f'{prefix}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def can_scrape(request):
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def metrics_view(request):
+    """
+    Expose this worker's metrics in the Prometheus text format, to staff and to the metrics token.
+    """
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,65 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+
+class PerformanceMiddleware:
+    """
+    Record query count/time, cache hits/misses, serializer and render time and total latency for every
+    request, report them in a ``Server-Timing`` header and fold them into the per-view histograms.
+    Keep it first in MIDDLEWARE so the total covers the rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(metrics.install_query_timer, dispatch_uid='metrics.install_query_timer')
+        # Connections opened before the handler was built (e.g. by system checks) need wrapping too.
+        for connection in connections.all(initialized_only=True):
+            metrics.install_query_timer(sender=type(connection), connection=connection)
+        metrics.install_serializer_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, request_metrics)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook runs; time it with a post-render callback.
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(_response):
+                request_metrics.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, request_metrics):
+        total = time.perf_counter() - request_metrics.started
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.registry.observe(view, request_metrics, total)
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        return response
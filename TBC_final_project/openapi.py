@@ -0,0 +1,140 @@
+"""
+Prebuilt OpenAPI schema.
+
+drf_spectacular's SpectacularAPIView introspects every view and serializer on each request. Instead,
+``manage.py build_openapi_schema`` renders the schema once (at deploy / container start) into
+OPENAPI_SCHEMA_DIR, and ``schema_view`` serves those bytes with a content-hash ETag and a long
+Cache-Control. The files are read on the first request, not at import, so startup pays nothing; if
+they are missing the schema is generated once in-process and kept in memory. The schema generator and
+the Swagger/Redoc views are imported only when used, which keeps them out of every other process that
+loads the URLconf (management commands run it through the system checks).
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+logger = logging.getLogger(__name__)
+
+# ?format= value -> (renderer, file name, content type)
+FORMATS = {
+    'yaml': (OpenApiYamlRenderer, 'schema.yaml', 'application/vnd.oai.openapi; charset=utf-8'),
+    'json': (OpenApiJsonRenderer, 'schema.json', 'application/vnd.oai.openapi+json; charset=utf-8'),
+}
+MANIFEST = 'manifest.json'
+CACHE_CONTROL = 'public, max-age=86400'
+
+
+def generate():
+    """
+    Render the schema in every format; returns {format: bytes}.
+    """
+    from drf_spectacular.generators import SchemaGenerator
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {name: renderer().render(schema, renderer_context={}) for name, (renderer, _, _) in FORMATS.items()}
+
+
+def etag_for(body):
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def write_artifacts(directory=None):
+    """
+    Generate the schema into ``directory`` (default OPENAPI_SCHEMA_DIR) with a manifest of ETags.
+    """
+    directory = directory or settings.OPENAPI_SCHEMA_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    bodies = generate()
+    manifest = {'generated_at': time.time(), 'generation_seconds': round(time.perf_counter() - started, 3)}
+    for name, body in bodies.items():
+        file_name = FORMATS[name][1]
+        (directory / file_name).write_bytes(body)
+        manifest[name] = {'file': file_name, 'etag': etag_for(body), 'bytes': len(body)}
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+class SchemaArtifact:
+    """
+    The schema bodies and ETags for this process, loaded once on first use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = None
+
+    def load(self):
+        directory = settings.OPENAPI_SCHEMA_DIR
+        try:
+            manifest = json.loads((directory / MANIFEST).read_text())
+            return {
+                name: ((directory / manifest[name]['file']).read_bytes(), manifest[name]['etag'])
+                for name in FORMATS
+            }
+        except (OSError, KeyError, ValueError):
+            logger.warning("prebuilt OpenAPI schema missing, generating in-process",
+                           extra={'directory': str(directory)})
+            return {name: (body, etag_for(body)) for name, body in generate().items()}
+
+    def get(self, name):
+        if self.entries is None:
+            with self.lock:
+                if self.entries is None:
+                    self.entries = self.load()
+        return self.entries.get(name)
+
+    def reset(self):
+        with self.lock:
+            self.entries = None
+
+
+artifact = SchemaArtifact()
+
+
+def requested_format(request):
+    return request.GET.get('format', 'yaml')
+
+
+def schema_etag(request):
+    entry = artifact.get(requested_format(request))
+    return entry[1] if entry else None
+
+
+@condition(etag_func=schema_etag)
+def schema_view(request):
+    """
+    Serve the prebuilt schema (``?format=json`` for JSON; YAML by default).
+    """
+    entry = artifact.get(requested_format(request))
+    if entry is None:
+        return HttpResponseNotFound()
+    body, _ = entry
+    response = HttpResponse(body, content_type=FORMATS[requested_format(request)][2])
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    A URLconf entry for the class-based view at ``view_path``, imported on its first request.
+    """
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from datetime import timedelta
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,12 +56,42 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson for JSON; MessagePack when the client sends `Accept: application/msgpack`
+    'DEFAULT_RENDERER_CLASSES': [
+        'TBC_final_project.renderers.ORJSONRenderer',
+        'TBC_final_project.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'TBC_final_project.renderers.ORJSONParser',
+        'TBC_final_project.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Write endpoints set `throttle_scope`; see TBC_final_project/throttling.py
+    'DEFAULT_THROTTLE_CLASSES': [
+        'TBC_final_project.throttling.UserTokenBucketThrottle',
+        'TBC_final_project.throttling.IPTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'like': '30/min',
+        'like_ip': '120/min',
+        'rsvp': '20/min',
+        'rsvp_ip': '60/min',
+        'follow': '30/min',
+        'follow_ip': '120/min',
+        'batch': '10/min',
+        'batch_ip': '30/min',
+        'comment': '10/min',
+        'comment_ip': '60/min',
+    },
 }
 
 MIDDLEWARE = [
+    'TBC_final_project.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -103,6 +134,32 @@ DATABASES = {
 }
 
 
+# Logging
+# Application loggers emit one JSON object per line; pass context through ``extra=``.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            '()': 'TBC_final_project.log.StructuredFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'loggers': {
+        'TBC_final_project': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO')},
+        'event': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO')},
+        'user': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO')},
+        'notifications': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO')},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -163,6 +220,12 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Bearer token Prometheus sends to /metrics; without one only staff sessions can read it.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Seconds an authenticated user stays in the cache used by CachedJWTAuthentication
+AUTH_USER_CACHE_TIMEOUT = 300
+
 
 # settings.py
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -189,3 +252,63 @@ CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+
+# Nothing reads task results; opt in per task with ignore_result=False if that changes.
+CELERY_TASK_IGNORE_RESULT = True
+# Separate queues so email fan-outs and purges never wait behind slow storage calls.
+# Each queue has its own worker profile in docker-compose.yml. Lower priority numbers run first.
+CELERY_TASK_ROUTES = {
+    'notifications.tasks.send_bulk_email': {'queue': 'bulk', 'priority': 5},
+    'notifications.tasks.notify_*': {'queue': 'bulk', 'priority': 3},
+    'event.tasks.*': {'queue': 'bulk', 'priority': 3},
+    'event.media_tasks.*': {'queue': 'media', 'priority': 5},
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Acknowledge after the task finishes so a crashed worker's task is redelivered, and prefetch one task
+# at a time: every queue's tasks are long.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Periodic jobs (event/tasks.py); all idempotent, so overlapping or repeated runs are harmless.
+CELERY_BEAT_SCHEDULE = {
+    'advance-event-statuses': {
+        'task': 'event.tasks.advance_event_statuses',
+        'schedule': crontab(minute='*/15'),
+    },
+    'queue-event-reminders': {
+        'task': 'event.tasks.queue_event_reminders',
+        'schedule': crontab(minute=5),
+    },
+    'requeue-stalled-purges': {
+        'task': 'event.tasks.requeue_stalled_purges',
+        'schedule': crontab(minute=35),
+    },
+    'rebuild-autocomplete-index': {
+        'task': 'event.tasks.rebuild_autocomplete_index',
+        'schedule': crontab(hour=3, minute=20),
+    },
+    'rebuild-tag-index': {
+        'task': 'event.tasks.rebuild_tag_index',
+        'schedule': crontab(hour=3, minute=40),
+    },
+}
+
+# Async Redis client used by the ASGI read views (event/async_views.py)
+ASYNC_CACHE_LOCATION = CACHES['default']['LOCATION']
+ASYNC_CACHE_KEY_PREFIX = 'async'
+
+# Live event counters over SSE (event/realtime.py). 'local' keeps pub/sub inside one process.
+REALTIME_BROKER = config('REALTIME_BROKER', default='redis')
+REALTIME_REDIS_URL = CACHES['default']['LOCATION']
+REALTIME_COALESCE_INTERVAL = 0.25  # seconds; at most 4 pushes per second per subscriber
+REALTIME_KEEPALIVE_SECONDS = 15
+
+# Prebuilt OpenAPI schema served at /api/schema/ (TBC_final_project/openapi.py);
+# written by `manage.py build_openapi_schema` at container start.
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
@@ -0,0 +1,62 @@
+"""
+Shared test fixtures.
+
+Everything Redis-backed (the django_redis cache, token buckets, membership sets, the tag and
+autocomplete indexes, live updates and the async views' cache) runs against fakeredis, an in-process
+Redis, so the suite needs no server. Each test starts from an empty fake server.
+"""
+import datetime
+from unittest import mock
+
+import fakeredis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from event.models import Category, Event
+from . import async_cache
+from .caching import reference_data
+
+# One fake server behind every client, as there is one Redis behind them in production.
+FAKE_REDIS_SERVER = fakeredis.FakeServer()
+
+
+def fake_redis_caches():
+    default = settings.CACHES['default']
+    pool_kwargs = {'connection_class': fakeredis.FakeRedisConnection, 'server': FAKE_REDIS_SERVER}
+    options = {**default.get('OPTIONS', {}), 'CONNECTION_POOL_KWARGS': pool_kwargs}
+    return {**settings.CACHES, 'default': {**default, 'OPTIONS': options}}
+
+
+@override_settings(CACHES=fake_redis_caches())
+class RedisTestCase(TestCase):
+    """
+    A TestCase whose Redis clients all talk to the fake server, emptied before each test, with
+    factories for the rows most tests need.
+    """
+
+    def setUp(self):
+        super().setUp()
+        get_redis_connection('default').flushall()
+        # The in-process tier would otherwise keep serving the previous test's categories and tags.
+        reference_data.invalidate()
+        for name, client in (('get_client', fakeredis.FakeAsyncRedis), ('get_sync_client', fakeredis.FakeRedis)):
+            patcher = mock.patch.object(async_cache, name, lambda client=client: client(server=FAKE_REDIS_SERVER))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_user(self, name, **fields):
+        return get_user_model().objects.create_user(
+            email=f"{name}@example.com", password="password", username=name, **fields
+        )
+
+    def create_event(self, title, organizer, **fields):
+        today = datetime.date.today()
+        defaults = {
+            'description': title, 'start_date': today, 'end_date': today, 'location': "Tbilisi",
+            'organizer': organizer,
+        }
+        if 'category' not in fields:
+            defaults['category'] = Category.objects.get_or_create(name="Music")[0]
+        return Event.objects.create(title=title, **{**defaults, **fields})
@@ -0,0 +1,307 @@
+import json
+import os
+import re
+import runpy
+import tempfile
+from contextlib import redirect_stderr
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import msgpack
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from event.models import Category, Event
+from . import caching, metrics, openapi, throttling
+from .renderers import ORJSONRenderer
+from .testing import RedisTestCase
+
+
+class PerformanceMetricsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.create_event("Jazz Night", self.user)
+
+    def timings(self, response):
+        return dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+
+    def test_server_timing_covers_queries_and_serialization(self):
+        response = self.client.get(reverse('event-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        timings = self.timings(response)
+        self.assertGreater(float(timings['serialize']), 0)
+        self.assertGreaterEqual(float(timings['total']), float(timings['serialize']))
+
+    def test_requests_are_folded_into_the_registry(self):
+        self.client.get(reverse('event-list'))
+        output = metrics.registry.render()
+        self.assertRegex(output, r'tbc_requests_total\{view="event-list"\} [1-9]')
+        self.assertIn('tbc_serialize_duration_seconds_count{view="event-list"}', output)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_need_the_token_or_a_staff_session(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(url, headers={'Authorization': "Bearer wrong"}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        response = self.client.get(url, headers={'Authorization': "Bearer secret"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('# TYPE tbc_requests_total counter', response.content.decode())
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(self.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_metrics_are_closed_without_a_token(self):
+        response = self.client.get(reverse('metrics'), headers={'Authorization': "Bearer "})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@mock.patch.dict(throttling.TokenBucketThrottle.THROTTLE_RATES, {'like': '2/min', 'like_ip': '3/min'})
+class TokenBucketThrottleTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        # Start each test on Redis, with the script registered against the fake server.
+        for name, value in (('_script', None), ('_redis_retry_at', 0.0), ('_local_buckets', throttling.LocalBuckets())):
+            patcher = mock.patch.object(throttling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.event = self.create_event("Jazz Night", self.create_user('organizer'))
+        self.url = reverse('like-event', args=[self.event.pk])
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_bucket_empties_after_the_burst(self):
+        client = self.client_for(self.create_user('alice'))
+        self.assertEqual(client.post(self.url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(client.delete(self.url).status_code, status.HTTP_200_OK)
+
+        response = client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # At 2/min one token comes back every 30 seconds.
+        self.assertTrue(25 <= int(response['Retry-After']) <= 30)
+
+    def test_users_have_separate_buckets_but_share_the_ip_one(self):
+        alice, bob = self.client_for(self.create_user('alice')), self.client_for(self.create_user('bob'))
+        alice.post(self.url)
+        alice.delete(self.url)
+
+        self.assertEqual(bob.post(self.url).status_code, status.HTTP_201_CREATED)
+        # Four writes from the one test client IP against an IP bucket of three.
+        self.assertEqual(bob.delete(self.url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_reads_are_not_throttled(self):
+        client = self.client_for(self.create_user('alice'))
+        for _ in range(5):
+            self.assertEqual(client.get(reverse('event-retrieve', args=[self.event.pk])).status_code,
+                             status.HTTP_200_OK)
+
+    def test_falls_back_to_local_buckets_without_redis(self):
+        with mock.patch('TBC_final_project.throttling.get_redis_connection',
+                        side_effect=RedisConnectionError("down")) as connect:
+            with self.assertLogs('TBC_final_project.throttling', 'WARNING'):
+                self.assertEqual(throttling.consume('bucket', 2, 1 / 60), (True, 0.0))
+            self.assertTrue(throttling.consume('bucket', 2, 1 / 60)[0])
+            allowed, wait = throttling.consume('bucket', 2, 1 / 60)
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 60, delta=1)
+        # Redis isn't retried until REDIS_RETRY_SECONDS have passed.
+        self.assertEqual(connect.call_count, 1)
+
+
+class GetOrBuildTests(RedisTestCase):
+    def build(self, value):
+        builds = []
+
+        def build():
+            builds.append(value)
+            return value
+        return build, builds
+
+    def expire(self, key):
+        cache.set(key, {**cache.get(key), 'fresh_until': 0})
+
+    def test_fresh_entry_is_not_rebuilt(self):
+        build, builds = self.build("first")
+        self.assertEqual(caching.get_or_build('key', build), "first")
+        self.assertEqual(caching.get_or_build('key', build), "first")
+        self.assertEqual(builds, ["first"])
+
+    def test_stale_entry_is_served_while_another_request_rebuilds(self):
+        caching.get_or_build('key', lambda: "old")
+        self.expire('key')
+        cache.add(caching.lock_key('key'), "another request")
+        build, builds = self.build("new")
+
+        self.assertEqual(caching.get_or_build('key', build), "old")
+        self.assertEqual(builds, [])
+
+    def test_lock_holder_rebuilds_and_releases_the_lock(self):
+        caching.get_or_build('key', lambda: "old")
+        self.expire('key')
+
+        self.assertEqual(caching.get_or_build('key', lambda: "new"), "new")
+        self.assertIsNone(cache.get(caching.lock_key('key')))
+        self.assertEqual(caching.get_or_build('key', lambda: "newer"), "new")
+
+    def test_cold_miss_waits_for_the_running_build(self):
+        cache.add(caching.lock_key('key'), "another request")
+
+        def finish_build(seconds):
+            caching.store('key', "built elsewhere", timeout=60)
+
+        with mock.patch('TBC_final_project.caching.time.sleep', side_effect=finish_build):
+            self.assertEqual(caching.get_or_build('key', lambda: "built here"), "built elsewhere")
+
+    @mock.patch.object(caching, 'COLD_WAIT', 0)
+    def test_cold_miss_builds_anyway_after_the_wait(self):
+        cache.add(caching.lock_key('key'), "another request")
+        with self.assertLogs('TBC_final_project.caching', 'WARNING'):
+            self.assertEqual(caching.get_or_build('key', lambda: "built here"), "built here")
+
+
+class TwoTierCacheTests(RedisTestCase):
+    def test_local_hits_skip_the_shared_cache(self):
+        tiers = caching.TwoTierCache('test')
+        tiers.get_or_build('key', lambda: "value")
+        with mock.patch('TBC_final_project.caching.cache.get') as shared_get:
+            self.assertEqual(tiers.get_or_build('key', lambda: "rebuilt"), "value")
+        shared_get.assert_not_called()
+
+    def test_invalidation_reaches_other_workers_at_their_next_check(self):
+        this_worker, other_worker = caching.TwoTierCache('test'), caching.TwoTierCache('test')
+        other_worker.get_or_build('key', lambda: "old")
+
+        this_worker.invalidate()
+        self.assertEqual(other_worker.get_or_build('key', lambda: "new"), "old")
+        other_worker.version_checked_at = 0.0  # the check interval has passed
+        self.assertEqual(other_worker.get_or_build('key', lambda: "new"), "new")
+
+    def test_local_tier_is_bounded(self):
+        tiers = caching.TwoTierCache('test', maxsize=2)
+        for key in ('a', 'b', 'a', 'c'):
+            tiers.get_or_build(key, lambda key=key: key)
+        self.assertEqual(list(tiers.local), ['a', 'c'])
+
+    def test_category_edits_reach_the_cached_list(self):
+        category = Category.objects.create(name="Jazz")
+        self.assertEqual([row['name'] for row in self.client.get(reverse('category-list')).data], ["Jazz"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.name = "Blues"
+            category.save()
+
+        self.assertEqual([row['name'] for row in self.client.get(reverse('category-list')).data], ["Blues"])
+
+
+class RendererTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.create_event("Jazz Night", self.user, price=Decimal('12.50'))
+
+    def test_json_matches_the_stock_renderer(self):
+        data = {'price': Decimal('12.50'), 'label': gettext_lazy("Music"), 'events': self.client.get(
+            reverse('event-list')).data}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    def test_msgpack_is_negotiated_with_accept(self):
+        response = self.client.get(reverse('event-list'), headers={'Accept': 'application/msgpack'})
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)[0]['title'], "Jazz Night")
+        self.assertEqual(self.client.get(reverse('event-list'))['Content-Type'], 'application/json')
+
+    def test_msgpack_request_bodies_are_parsed(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('event-comments', args=[Event.objects.get().pk]),
+                               msgpack.packb({'content': "Packed"}), content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['comment']['content'], "Packed")
+
+    def test_malformed_json_is_a_bad_request(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('event-comments', args=[Event.objects.get().pk]), b'{"content": ',
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SchemaViewTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(OPENAPI_SCHEMA_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        openapi.artifact.reset()
+        self.addCleanup(openapi.artifact.reset)
+
+    def test_prebuilt_schema_is_served_with_its_manifest_etag(self):
+        # drf_spectacular prints its warnings about undocumented views to stderr.
+        with redirect_stderr(StringIO()):
+            call_command('build_openapi_schema', stdout=StringIO())
+        manifest = json.loads((self.directory / openapi.MANIFEST).read_text())
+
+        with mock.patch.object(openapi, 'generate') as generate:
+            response = self.client.get(reverse('schema'), {'format': 'json'})
+            generate.assert_not_called()
+        self.assertEqual(response['ETag'], manifest['json']['etag'])
+        self.assertEqual(response['Cache-Control'], openapi.CACHE_CONTROL)
+        self.assertIn('/events/', json.loads(response.content)['paths'])
+
+        response = self.client.get(reverse('schema'), headers={'If-None-Match': manifest['yaml']['etag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @mock.patch.object(openapi, 'generate', return_value={'yaml': b'openapi: 3.0.3\n', 'json': b'{}'})
+    def test_missing_artifacts_are_generated_once_in_process(self, generate):
+        with self.assertLogs('TBC_final_project.openapi', 'WARNING'):
+            self.assertEqual(self.client.get(reverse('schema')).content, b'openapi: 3.0.3\n')
+        self.assertEqual(self.client.get(reverse('schema'), {'format': 'json'}).content, b'{}')
+        self.assertEqual(self.client.get(reverse('schema'), {'format': 'xml'}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        generate.assert_called_once()
+
+
+class GunicornConfigTests(SimpleTestCase):
+    path = Path(settings.BASE_DIR) / 'TBC_final_project' / 'gunicorn.conf.py'
+
+    def load(self, **environ):
+        with mock.patch.dict(os.environ):
+            for name in ('WEB_CONCURRENCY', 'GUNICORN_MAX_REQUESTS'):
+                os.environ.pop(name, None)
+            os.environ.update(environ)
+            return runpy.run_path(str(self.path))
+
+    def test_one_worker_per_core_unless_overridden(self):
+        config = self.load()
+        self.assertEqual(config['workers'], config['available_cpus']())
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(self.load(WEB_CONCURRENCY='3')['workers'], 3)
+        self.assertEqual(self.load(GUNICORN_MAX_REQUESTS='500')['max_requests_jitter'], 50)
+
+    def test_forked_workers_open_their_own_connections(self):
+        with mock.patch('django.db.connections.close_all') as close_all:
+            self.load()['post_fork'](server=None, worker=None)
+        close_all.assert_called_once()
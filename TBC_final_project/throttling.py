@@ -0,0 +1,162 @@
+"""
+Token-bucket throttles for write endpoints.
+
+A view opts in by setting ``throttle_scope``; its rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+as ``'<scope>'`` (per user) and ``'<scope>_ip'`` (per client IP), in DRF's usual ``'30/min'`` format.
+The number is the bucket size (burst) and the bucket refills evenly over the period.
+
+Each check is a single Lua script call, so refill-and-take is atomic across workers. If Redis can't
+be reached the throttles fall back to per-process buckets instead of failing the request.
+"""
+import logging
+import threading
+import time
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket key. ARGV: capacity, refill rate (tokens per second), cost.
+# Uses the Redis clock so workers with skewed clocks share one timeline.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+# After a Redis failure, use the local buckets for this long before trying Redis again.
+REDIS_RETRY_SECONDS = 5
+
+
+class LocalBuckets:
+    """
+    In-process token buckets used while Redis is unavailable.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def consume(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            tokens, ts = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            if tokens >= cost:
+                self.buckets[key] = (tokens - cost, now)
+                return True, 0.0
+            self.buckets[key] = (tokens, now)
+            return False, (cost - tokens) / rate
+
+
+_local_buckets = LocalBuckets()
+_script = None
+_redis_retry_at = 0.0
+
+
+def consume(key, capacity, rate, cost=1):
+    """
+    Take ``cost`` tokens from the bucket at ``key``; returns (allowed, seconds until enough tokens).
+    """
+    global _script, _redis_retry_at
+    if time.monotonic() >= _redis_retry_at:
+        try:
+            if _script is None:
+                _script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, wait = _script(keys=[key], args=[capacity, rate, cost])
+            return bool(allowed), float(wait)
+        except (RedisError, NotImplementedError) as exc:
+            # NotImplementedError: the default cache isn't django_redis (e.g. local development).
+            logger.warning("token bucket falling back to local buckets", extra={'error': str(exc)})
+            _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+    return _local_buckets.consume(key, capacity, rate, cost)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class; subclasses choose the rate key and the identity being limited.
+    Safe (read-only) requests and views without ``throttle_scope`` are never throttled.
+    """
+    THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+    rate_suffix = ''
+
+    def __init__(self):
+        self.wait_seconds = 0.0
+
+    def parse_rate(self, rate):
+        """
+        '30/min' -> (capacity 30, refill 0.5 tokens per second).
+        """
+        num, period = rate.split('/')
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        capacity = int(num)
+        return capacity, capacity / duration
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope = getattr(view, 'throttle_scope', None)
+        rate = self.THROTTLE_RATES.get(f'{scope}{self.rate_suffix}') if scope else None
+        if not rate:
+            return True
+
+        capacity, refill = self.parse_rate(rate)
+        key = f"throttle:{scope}:{self.get_ident_key(request)}"
+        allowed, self.wait_seconds = consume(key, capacity, refill)
+        return allowed
+
+    def wait(self):
+        # DRF turns this into the Retry-After header.
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per authenticated user (anonymous requests are keyed by IP).
+    """
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"anon:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per client IP, so many accounts behind one client can't multiply the limit.
+    """
+    rate_suffix = '_ip'
+
+    def get_ident_key(self, request):
+        return f"ip:{self.get_ident(request)}"
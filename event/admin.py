@@ -1,8 +1,80 @@
 from django.contrib import admin
-from .models import Tag, Category, EventMedia, Event, EventComment, EventReview
-admin.site.register(Tag)
-admin.site.register(Category)
-admin.site.register(EventMedia)
-admin.site.register(Event)
-admin.site.register(EventComment)
-admin.site.register(EventReview)
+
+from TBC_final_project.admin import ScalableModelAdmin
+from user.search import prefix_filter
+from .models import Tag, Category, EventMedia, Event, EventComment, EventReview, LikeEvent
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
+
+
+@admin.register(Event)
+class EventAdmin(ScalableModelAdmin):
+    list_display = ['id', 'title', 'status', 'start_date', 'category', 'organizer', 'likes_number', 'rating_count',
+                    'is_deleted']
+    list_select_related = ['category', 'organizer']
+    list_filter = ['status', 'is_deleted', 'is_online', 'featured']
+    # Matched as a prefix through the Lower('title') index (user/search.py).
+    search_fields = ['title']
+    search_id_fields = ['id']
+    # Users are picked by id: a <select> of every user would render the whole table.
+    raw_id_fields = ['organizer', 'attendees', 'likes']
+    autocomplete_fields = ['category', 'tags']
+    readonly_fields = ['likes_number', 'rating_count', 'rating_sum', 'version', 'created_at', 'updated_at',
+                       'deleted_at']
+
+    def get_queryset(self, request):
+        # Soft-deleted events stay visible here until they are purged, so the rows come from all_objects
+        # rather than the default manager, in the order ModelAdmin chose.
+        queryset = super().get_queryset(request)
+        return Event.all_objects.order_by(*queryset.query.order_by)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term and not term.isdigit():
+            return prefix_filter(queryset, term, self.search_fields), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(EventComment)
+class EventCommentAdmin(ScalableModelAdmin):
+    list_display = ['id', 'user', 'event', 'depth', 'reply_count', 'created_at']
+    list_select_related = ['user', 'event']
+    search_id_fields = ['id', 'event_id']
+    raw_id_fields = ['user', 'event', 'parent']
+    readonly_fields = ['path', 'depth', 'reply_count']
+
+
+@admin.register(EventReview)
+class EventReviewAdmin(ScalableModelAdmin):
+    list_display = ['id', 'user', 'event', 'rating', 'created_at']
+    list_select_related = ['user', 'event']
+    list_filter = ['rating']
+    search_id_fields = ['id', 'event_id']
+    raw_id_fields = ['user', 'event']
+
+
+@admin.register(EventMedia)
+class EventMediaAdmin(ScalableModelAdmin):
+    list_display = ['id', 'file', 'media_type', 'event', 'created_at']
+    list_select_related = ['event']
+    list_filter = ['media_type']
+    search_id_fields = ['id', 'event_id']
+    raw_id_fields = ['event']
+
+
+@admin.register(LikeEvent)
+class LikeEventAdmin(ScalableModelAdmin):
+    list_display = ['id', 'user', 'event', 'created_at']
+    list_select_related = ['user', 'event']
+    search_id_fields = ['event_id']
+    raw_id_fields = ['user', 'event']
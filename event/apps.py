@@ -6,4 +6,5 @@ class EventConfig(AppConfig):
     name = 'event'
 
     def ready(self):
+        import event.signals  # Keep denormalised event data and caches in sync
         import notifications.signals  # Ensure the signals are loaded
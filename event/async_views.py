@@ -0,0 +1,213 @@
+"""
+Async versions of the hot read endpoints.
+
+These are plain Django async views rather than DRF views (DRF dispatches synchronously), so under
+an ASGI server they wait on the database and Redis without holding a worker thread. Everything the
+serializers touch is prefetched up front, which keeps serialization free of lazy queries.
+
+Each view still goes through DRF's authentication, permission and throttle checks (``drf_checks``),
+with the same policy as the sync read views.
+"""
+import functools
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.views import APIView
+
+from TBC_final_project import async_cache
+from . import membership, realtime
+from .filters import filter_events, order_events
+from .models import Event, Category, Tag, EventReview, EventComment
+from .pagination import CustomPagination
+from .serializers import EventSerializer, EventListSerializer, CategorySerializer, TagSerializer
+
+# async_cache keys of the full category and tag lists; dropped by the signals whenever one changes.
+REFERENCE_LIST_KEYS = {Category: 'categories', Tag: 'tags'}
+
+
+def event_queryset():
+    """
+    Event queryset with every relation EventSerializer reads already loaded.
+    """
+    return Event.objects.select_related('category').prefetch_related(
+        'tags',
+        'media',
+        'attendees',
+        Prefetch('reviews', queryset=EventReview.objects.select_related('user')),
+        Prefetch('comments', queryset=EventComment.objects.select_related('user')),
+    )
+
+
+def event_list_queryset():
+    """
+    Event queryset with every relation EventListSerializer reads already loaded.
+    """
+    return Event.objects.select_related('category').prefetch_related(
+        'tags',
+        'media',
+        Prefetch('reviews', queryset=EventReview.objects.select_related('user')),
+    )
+
+
+class ReadPolicy(APIView):
+    """
+    Never dispatched: holds the DRF settings ``drf_checks`` applies to the async views.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+def check_request(request):
+    """
+    Run DRF's authentication, permission and throttle checks on a Django request. Returns the policy
+    view, holding the DRF request, and the error response when a check failed.
+    """
+    view = ReadPolicy()
+    view.args, view.kwargs = (), {}
+    view.headers = view.default_response_headers
+    view.request = view.initialize_request(request)
+    try:
+        view.initial(view.request)
+    except APIException as exc:
+        return view, render_exception(view, exc)
+    return view, None
+
+
+def render_exception(view, exc):
+    response = view.finalize_response(view.request, view.handle_exception(exc))
+    return response.render()
+
+
+def drf_checks(view_func):
+    """
+    Wrap an async view in the DRF checks. The view receives the DRF request (``request.user`` is the
+    authenticated user), and APIExceptions it raises are rendered the way DRF would.
+    """
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        view, denied = await sync_to_async(check_request)(request)
+        if denied is not None:
+            return denied
+        try:
+            return await view_func(view.request, *args, **kwargs)
+        except APIException as exc:
+            return await sync_to_async(render_exception)(view, exc)
+    return wrapper
+
+
+async def get_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+def event_page(request):
+    """
+    One page of the filtered event list, paginated like the "my events" pages.
+    """
+    queryset = order_events(filter_events(event_list_queryset(), request.GET), request.GET)
+    if not queryset.ordered:
+        # Pages need a stable order.
+        queryset = queryset.order_by('id')
+    paginator = CustomPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(EventListSerializer(page, many=True).data).data
+
+
+@drf_checks
+async def event_list(request):
+    """
+    List events a page at a time, filtered by the same query parameters as EventListAPIView and with
+    the user's is_liked / is_attending flags.
+    """
+    # The absolute URI, because the cached page's next/previous links include the host.
+    cache_key = f"events:page:{hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()}"
+    data = await async_cache.get_json(cache_key)
+
+    if data is None:
+        # Filtering may read the Redis tag index and paginating counts rows; both are blocking.
+        data = await sync_to_async(event_page)(request)
+        await async_cache.set_json(cache_key, data, timeout=60)
+
+    data['results'] = await sync_to_async(membership.annotate)(data['results'], request.user)
+    response = JsonResponse(data)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+@drf_checks
+async def event_retrieve(request, id):
+    event = await get_object_or_404(event_queryset(), id=id)
+    return JsonResponse(EventSerializer(event).data)
+
+
+@drf_checks
+async def event_stats(request, event_id):
+    """
+    Retrieve event-specific statistics (attendees, likes) in a single query.
+    """
+    queryset = Event.objects.annotate(
+        rsvp_count=Count('attendees', distinct=True),
+        like_count=Count('likes', distinct=True),
+    ).values('id', 'title', 'rsvp_count', 'like_count')
+    event = await get_object_or_404(queryset, id=event_id)
+    stats = {
+        "event_id": event['id'],
+        "event_title": event['title'],
+        "rsvp_count": event['rsvp_count'],
+        "like_count": event['like_count'],
+    }
+    return JsonResponse(stats)
+
+
+@drf_checks
+async def event_live(request, event_id):
+    """
+    Stream an event's like/RSVP/comment counters as Server-Sent Events instead of polling stats/.
+    """
+    snapshots = await realtime.fetch_snapshots([event_id])
+    if event_id not in snapshots:
+        raise Http404("No Event matches the given query.")
+    response = StreamingHttpResponse(
+        realtime.event_stream(event_id, snapshots[event_id]), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+    return response
+
+
+@drf_checks
+async def category_list(request):
+    data = await async_cache.get_json(REFERENCE_LIST_KEYS[Category])
+    if data is None:
+        categories = [category async for category in Category.objects.all()]
+        data = CategorySerializer(categories, many=True).data
+        await async_cache.set_json(REFERENCE_LIST_KEYS[Category], data)
+    return JsonResponse(data, safe=False)
+
+
+@drf_checks
+async def category_detail(request, id):
+    category = await get_object_or_404(Category.objects.all(), id=id)
+    return JsonResponse(CategorySerializer(category).data)
+
+
+@drf_checks
+async def tag_list(request):
+    data = await async_cache.get_json(REFERENCE_LIST_KEYS[Tag])
+    if data is None:
+        tags = [tag async for tag in Tag.objects.all()]
+        data = TagSerializer(tags, many=True).data
+        await async_cache.set_json(REFERENCE_LIST_KEYS[Tag], data)
+    return JsonResponse(data, safe=False)
+
+
+@drf_checks
+async def tag_detail(request, id):
+    tag = await get_object_or_404(Tag.objects.all(), id=id)
+    return JsonResponse(TagSerializer(tag).data)
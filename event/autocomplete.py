@@ -0,0 +1,179 @@
+"""
+Search-as-you-type over tag names, category names and event titles.
+
+Every entry is indexed in one Redis sorted set per prefix: ``autocomplete:prefix:<kind>:<prefix>``
+holds ``"<id>:<name>"`` members scored by popularity (events per tag or category, likes per event). A
+lookup is one ZREVRANGE per kind, pipelined into a single round trip, with no database access.
+Prefixes are taken from the start of the name and from each of its first MAX_WORDS words, lowercased
+and cut at MAX_PREFIX_LENGTH characters. ``autocomplete:names:<kind>`` maps ids to indexed names.
+
+Writes update the index incrementally after commit (event/signals.py). ``manage.py
+build_autocomplete_index`` and a nightly beat job resync it with the database, which also repairs
+scores changed by set-based updates that skip the signals.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Category, Event, Tag
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'autocomplete'
+MAX_PREFIX_LENGTH = 20
+MAX_WORDS = 4
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+# Entries resynced per pipeline by rebuild().
+REBUILD_CHUNK_SIZE = 500
+
+
+def tag_entries(ids=None):
+    queryset = Tag.objects.annotate(score=Count('event', filter=Q(event__is_deleted=False)))
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return queryset.values_list('id', 'name', 'score')
+
+
+def category_entries(ids=None):
+    queryset = Category.objects.annotate(score=Count('event', filter=Q(event__is_deleted=False)))
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return queryset.values_list('id', 'name', 'score')
+
+
+def event_entries(ids=None):
+    queryset = Event.objects.all()
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return queryset.values_list('id', 'title', 'likes_number')
+
+
+# kind -> rows of (id, name, score) for the given ids, or for everything when ids is None
+KINDS = {
+    'tag': tag_entries,
+    'category': category_entries,
+    'event': event_entries,
+}
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def word_suffixes(name):
+    # "Summer Jazz Night" -> ["summer jazz night", "jazz night", "night"]
+    words = normalize(name).split(' ')
+    return [' '.join(words[start:]) for start in range(min(len(words), MAX_WORDS))]
+
+
+def prefixes(name):
+    result = set()
+    for phrase in word_suffixes(name):
+        phrase = phrase[:MAX_PREFIX_LENGTH]
+        result.update(phrase[:length] for length in range(1, len(phrase) + 1))
+    return result
+
+
+def prefix_key(kind, prefix):
+    return f'{KEY_PREFIX}:prefix:{kind}:{prefix}'
+
+
+def names_key(kind):
+    # id -> indexed name, so a rename or delete knows which members to remove.
+    # Its own namespace: a prefix can be any text, "names" included.
+    return f'{KEY_PREFIX}:names:{kind}'
+
+
+def sync(kind, ids):
+    """
+    Bring the index entries for ``ids`` in line with the database: add new ones, re-score and rename
+    existing ones, remove those that no longer exist.
+    """
+    ids = [int(pk) for pk in ids]
+    if not ids:
+        return
+    client = get_redis_connection('default')
+    current = {pk: (name, score) for pk, name, score in KINDS[kind](ids)}
+    previous = client.hmget(names_key(kind), ids)
+    pipe = client.pipeline(transaction=False)
+    for pk, old_name in zip(ids, previous):
+        entry = current.get(pk)
+        if old_name is not None:
+            old_name = old_name.decode()
+            if entry is None or entry[0] != old_name:
+                member = f'{pk}:{old_name}'
+                for prefix in prefixes(old_name):
+                    pipe.zrem(prefix_key(kind, prefix), member)
+        if entry is None:
+            pipe.hdel(names_key(kind), pk)
+            continue
+        name, score = entry
+        member = f'{pk}:{name}'
+        for prefix in prefixes(name):
+            pipe.zadd(prefix_key(kind, prefix), {member: score})
+        pipe.hset(names_key(kind), pk, name)
+    pipe.execute()
+
+
+def schedule_sync(kind, ids):
+    """
+    Resync ``ids`` once the current transaction commits. Never raises: the index is best effort and
+    the nightly rebuild catches up after a Redis outage.
+    """
+    ids = list(ids)
+
+    def run():
+        try:
+            sync(kind, ids)
+        except RedisError:
+            logger.warning("autocomplete index update failed", extra={'kind': kind, 'ids': ids[:20]})
+
+    transaction.on_commit(run)
+
+
+def rebuild():
+    """
+    Resync every entry of every kind, and drop entries whose rows are gone. Runs in place, so lookups
+    keep working meanwhile. Returns {kind: entries indexed}.
+    """
+    client = get_redis_connection('default')
+    counts = {}
+    for kind, entries in KINDS.items():
+        ids = [pk for pk, _, _ in entries().order_by('pk').iterator(chunk_size=2000)]
+        # Indexed ids whose rows are gone; sync() removes them.
+        stale = {int(pk) for pk in client.hkeys(names_key(kind))}.difference(ids)
+        ids.extend(sorted(stale))
+        for start in range(0, len(ids), REBUILD_CHUNK_SIZE):
+            sync(kind, ids[start:start + REBUILD_CHUNK_SIZE])
+        counts[kind] = len(ids) - len(stale)
+    return counts
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT):
+    """
+    The most popular entries of each kind whose name (or one of its first words) starts with ``query``:
+    {kind: [{'id': ..., 'name': ...}, ...]}.
+    """
+    kinds = list(kinds or KINDS)
+    text = normalize(query)
+    if not text:
+        return {kind: [] for kind in kinds}
+    pipe = get_redis_connection('default').pipeline(transaction=False)
+    for kind in kinds:
+        pipe.zrevrange(prefix_key(kind, text[:MAX_PREFIX_LENGTH]), 0, limit - 1)
+    results = {}
+    for kind, members in zip(kinds, pipe.execute()):
+        rows = []
+        for member in members:
+            pk, name = member.decode().split(':', 1)
+            # Queries longer than the indexed prefixes are narrowed here.
+            if len(text) > MAX_PREFIX_LENGTH and not any(
+                    phrase.startswith(text) for phrase in word_suffixes(name)):
+                continue
+            rows.append({'id': int(pk), 'name': name})
+        results[kind] = rows
+    return results
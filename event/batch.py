@@ -0,0 +1,154 @@
+"""
+Many like / RSVP / follow operations in one request.
+
+Clients that queue actions offline send them as an ordered list of ``{"op": ..., "id": ...}``:
+    like / unlike       event id
+    rsvp / unrsvp       event id
+    follow / unfollow   user id
+
+Each operation is checked against the state left by the ones before it, with the same rules and
+messages as LikeEventView, RSVPView and FollowUserView, and gets its own result. Failed operations
+don't stop the rest. Only the net change per relation is written: one insert and one delete through
+the related managers, so the m2m signals (versions, live updates, membership sets) fire once per
+relation instead of once per operation. Everything runs in one transaction.
+"""
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+
+from user.models import CustomUser
+from . import autocomplete
+from .models import Event
+
+MAX_OPERATIONS = 500
+
+# op -> (relation, add)
+OPERATIONS = {
+    'like': ('liked', True),
+    'unlike': ('liked', False),
+    'rsvp': ('attending', True),
+    'unrsvp': ('attending', False),
+    'follow': ('following', True),
+    'unfollow': ('following', False),
+}
+EVENT_RELATIONS = ('liked', 'attending')
+
+NOT_FOUND = {'status': status.HTTP_404_NOT_FOUND, 'error': "Not found."}
+
+
+def ok(code, message):
+    return {'status': code, 'message': message}
+
+
+def error(message):
+    return {'status': status.HTTP_400_BAD_REQUEST, 'error': message}
+
+
+def current_state(user, ids):
+    """
+    {relation: ids from ``ids[relation]`` the user is currently linked to}, one query per relation.
+    """
+    state = {relation: set() for relation, _ in OPERATIONS.values()}
+    if ids['liked']:
+        state['liked'] = set(Event.likes.through.objects.filter(
+            customuser_id=user.pk, event_id__in=ids['liked']).values_list('event_id', flat=True))
+    if ids['attending']:
+        state['attending'] = set(Event.attendees.through.objects.filter(
+            customuser_id=user.pk, event_id__in=ids['attending']).values_list('event_id', flat=True))
+    if ids['following']:
+        # target.followers holds the users following target: rows run from the target to the follower.
+        state['following'] = set(CustomUser.followers.through.objects.filter(
+            to_customuser_id=user.pk, from_customuser_id__in=ids['following'],
+        ).values_list('from_customuser_id', flat=True))
+    return state
+
+
+def check(op, target, user, linked):
+    """
+    The result of applying ``op`` to ``target`` (an Event or a (pk, username) pair) given whether the
+    user is currently ``linked`` to it.
+    """
+    if op == 'like':
+        if linked:
+            return ok(status.HTTP_200_OK, "You have already liked this event.")
+        return ok(status.HTTP_201_CREATED, "Event liked successfully!")
+    if op == 'unlike':
+        if not linked:
+            return error("You have not liked this event.")
+        return ok(status.HTTP_200_OK, "Event unliked successfully.")
+    if op == 'rsvp':
+        if target.status == 'canceled':
+            return error("You cannot RSVP to a canceled event.")
+        if not target.registration_open:
+            return error("Registration for this event is closed.")
+        if linked:
+            return ok(status.HTTP_200_OK, "You have already RSVP'd to this event.")
+        return ok(status.HTTP_201_CREATED, "Successfully RSVP'd to the event!")
+    if op == 'unrsvp':
+        if not linked:
+            return error("You have not RSVP'd to this event.")
+        return ok(status.HTTP_200_OK, "Your RSVP has been withdrawn.")
+
+    pk, username = target
+    if pk == user.pk:
+        return error("You cannot follow yourself.")
+    if op == 'follow':
+        if linked:
+            return ok(status.HTTP_200_OK, f"You are already following {username}.")
+        return ok(status.HTTP_200_OK, f"You have followed {username}.")
+    if not linked:
+        return error(f"You are not following {username}.")
+    return ok(status.HTTP_200_OK, f"You have unfollowed {username}.")
+
+
+def execute(user, operations):
+    """
+    Run validated ``operations`` (dicts with ``op`` and ``id``) for ``user`` and return one result per
+    operation, in order: ``{'op', 'id', 'status', 'message' | 'error'}``.
+    """
+    ids = {relation: set() for relation, _ in OPERATIONS.values()}
+    for operation in operations:
+        ids[OPERATIONS[operation['op']][0]].add(operation['id'])
+
+    with transaction.atomic():
+        event_ids = ids['liked'] | ids['attending']
+        events = Event.objects.only('id', 'status', 'registration_deadline').in_bulk(event_ids) if event_ids else {}
+        users = dict(CustomUser.objects.filter(pk__in=ids['following']).values_list('pk', 'username')) \
+            if ids['following'] else {}
+        initial = current_state(user, ids)
+        state = {relation: set(linked) for relation, linked in initial.items()}
+
+        results = []
+        for operation in operations:
+            op, pk = operation['op'], operation['id']
+            relation, add = OPERATIONS[op]
+            if relation in EVENT_RELATIONS:
+                target = events.get(pk)
+            else:
+                target = (pk, users[pk]) if pk in users else None
+            if target is None:
+                result = dict(NOT_FOUND)
+            else:
+                result = check(op, target, user, pk in state[relation])
+                if 'message' in result and add:
+                    state[relation].add(pk)
+                elif 'message' in result:
+                    state[relation].discard(pk)
+            results.append({'op': op, 'id': pk, **result})
+
+        managers = {'liked': user.liked_events, 'attending': user.attendees, 'following': user.following}
+        for relation, manager in managers.items():
+            added = state[relation] - initial[relation]
+            removed = initial[relation] - state[relation]
+            if added:
+                manager.add(*added)
+            if removed:
+                manager.remove(*removed)
+            if relation == 'liked' and (added or removed):
+                # Queryset updates, so the versions bumped by the likes signal aren't overwritten.
+                if added:
+                    Event.objects.filter(pk__in=added).update(likes_number=F('likes_number') + 1)
+                if removed:
+                    Event.objects.filter(pk__in=removed).update(likes_number=F('likes_number') - 1)
+                autocomplete.schedule_sync('event', added | removed)
+    return results
@@ -0,0 +1,116 @@
+"""
+In-process HTTP benchmark helpers shared by the benchmark management commands.
+
+Requests go through Django's test clients, so the numbers include middleware, views, serialization
+and the database, but not a real network or server process.
+"""
+import asyncio
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import AsyncClient, Client
+
+# PerformanceMiddleware reports the request's query count in the Server-Timing header.
+QUERY_COUNT_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of ``samples`` (which must already be sorted).
+    """
+    if not samples:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100 * len(samples))) - 1, 0)
+    return samples[rank]
+
+
+def query_count(response):
+    match = QUERY_COUNT_RE.search(response.get('Server-Timing', ''))
+    return int(match.group(1)) if match else 0
+
+
+def summarize(latencies, elapsed, errors=0, queries=0):
+    """
+    Turn raw per-request latencies (seconds) into throughput and latency percentiles (milliseconds).
+    """
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "queries_per_request": round(queries / count, 2) if count else 0.0,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def run_wsgi(path, requests, concurrency, headers=None):
+    """
+    Drive ``path`` through the WSGI handler from a pool of ``concurrency`` threads.
+    """
+    headers = headers or {}
+    local = threading.local()
+
+    def one_request(_):
+        # The test client keeps per-instance state, so give every thread its own.
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        return time.perf_counter() - started, response.status_code >= 400, query_count(response)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - started
+    return collect(results, elapsed)
+
+
+def run_asgi(path, requests, concurrency, headers=None):
+    """
+    Drive ``path`` through the ASGI handler with ``concurrency`` requests in flight on one event loop.
+    """
+    headers = headers or {}
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                return time.perf_counter() - started, response.status_code >= 400, query_count(response)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one_request() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(main())
+    return collect(results, elapsed)
+
+
+def collect(results, elapsed):
+    return summarize(
+        [latency for latency, _, _ in results],
+        elapsed,
+        errors=sum(failed for _, failed, _ in results),
+        queries=sum(queries for _, _, queries in results),
+    )
+
+
+def run(path, mode, requests, concurrency, headers=None):
+    """
+    Benchmark ``path`` through the ``wsgi`` or ``asgi`` handler.
+    """
+    runner = run_asgi if mode == 'asgi' else run_wsgi
+    return runner(path, requests, concurrency, headers=headers)
@@ -0,0 +1,62 @@
+"""
+HTTP validators (ETag / Last-Modified) for event resources.
+
+Each event carries a ``version`` counter that is bumped together with ``updated_at`` whenever the
+event or anything rendered with it changes (see Event.bump_version and event/signals.py). The
+validators come from one small values() query, so a matching If-None-Match / If-Modified-Since is
+answered with 304 before the event, its relations or the serializer are touched.
+
+The event list is served from a cache entry, so its ETag is taken from the entry (event_list_etag)
+and checked in the view once the user is known.
+"""
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from . import membership
+from .models import Event
+
+
+def event_validators(request, event_id):
+    """
+    (etag, last_modified) for one event, or (None, None) if it doesn't exist. Memoized on the request,
+    since Django asks for the ETag and Last-Modified separately.
+    """
+    cached = getattr(request, '_event_validators', None)
+    if cached is None or cached[0] != event_id:
+        row = Event.objects.filter(pk=event_id).values_list('version', 'updated_at').first()
+        if row is None:
+            validators = (None, None)
+        else:
+            version, updated_at = row
+            validators = (f'W/"{event_id}.{version}.{updated_at.timestamp():.6f}"', updated_at)
+        cached = request._event_validators = (event_id, validators)
+    return cached[1]
+
+
+def event_etag(request, *args, **kwargs):
+    return event_validators(request, kwargs.get('event_id', kwargs.get('id')))[0]
+
+
+def event_last_modified(request, *args, **kwargs):
+    return event_validators(request, kwargs.get('event_id', kwargs.get('id')))[1]
+
+
+def event_list_etag(entry, user):
+    """
+    ETag for a cached list entry as served to ``user``: the entry's build id, so the tag always
+    describes the body it is sent with (stale copies included), plus, for a signed-in user, the
+    version of their likes and RSVPs behind the is_liked / is_attending flags. None when that
+    version can't be read. No Last-Modified for lists: deleting an event doesn't move any timestamp.
+    """
+    build = entry['build']
+    if user is None or not user.is_authenticated:
+        return f'W/"{build}"'
+    member_version = membership.version(user.pk)
+    if member_version is None:
+        return None
+    return f'W/"{build}.{user.pk}.{member_version}"'
+
+
+# Apply to a view's get() with @event_conditional; URL kwarg `event_id` or `id` names the event.
+event_conditional = method_decorator(condition(etag_func=event_etag, last_modified_func=event_last_modified),
+                                     name='get')
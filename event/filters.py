@@ -0,0 +1,114 @@
+from django.db.models import Count, F, Q
+
+from . import tag_index
+from .models import Event
+
+# `ordering` query parameter values (optionally prefixed with '-') and the expression each sorts by.
+ORDERINGS = {
+    'rating': Event.average_rating_expression,
+    'likes': lambda: F('likes_number'),
+    'start_date': lambda: F('start_date'),
+    'created': lambda: F('created_at'),
+}
+
+
+# Query parameters read by filter_events.
+FILTER_PARAMS = ('query', 'date', 'category', 'location', 'city', 'status', 'tags', 'tags_all', 'tags_none')
+
+# Facet dimension -> the filter parameter it narrows; see facet_counts.
+FACETS = {
+    'category': 'category',
+    'tags': 'tags',
+    'city': 'city',
+    'status': 'status',
+}
+# Values returned per facet dimension, most frequent first.
+FACET_LIMIT = 50
+
+
+def filter_events(queryset, params):
+    """
+    Apply the event list query parameters (query, date, category, location, city, status and the
+    tags / tags_all / tags_none expression) to a queryset. Shared by the sync and async list views so
+    both return the same rows. Tag filters read the Redis tag index (event/tag_index.py), so call this
+    from synchronous code.
+    """
+    query = params.get('query', None)
+    date = params.get('date', None)
+    category = params.get('category', None)
+    location = params.get('location', None)
+    city = params.get('city', None)
+    status = params.get('status', None)
+
+    if query:
+        queryset = queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        )
+
+    if date:
+        queryset = queryset.filter(start_date=date)
+
+    if category:
+        queryset = queryset.filter(category__name__iexact=category)
+
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
+    if city:
+        queryset = queryset.filter(city__iexact=city)
+
+    if status:
+        queryset = queryset.filter(status=status)
+
+    return tag_index.filter_by_tags(queryset, params)
+
+
+def facet_counts(params):
+    """
+    Event counts per category, tag, city and status for the list query in ``params``: one grouped
+    query per dimension. Each dimension applies every filter except its own, so the counts show what
+    choosing a different value would return (with ``?category=music`` the category counts still list
+    the other categories, while the tag, city and status counts are for music events only).
+    """
+    def events_without(dimension):
+        param = FACETS[dimension]
+        return filter_events(Event.objects.order_by(), {k: v for k, v in params.items() if k != param})
+
+    def grouped(queryset, *fields):
+        return queryset.values(*fields).annotate(count=Count('pk')).order_by('-count', *fields)[:FACET_LIMIT]
+
+    tag_links = Event.tags.through.objects.filter(event__in=events_without('tags').values('id'))
+    cities = events_without('city').exclude(city__isnull=True).exclude(city='')
+    return {
+        'category': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in grouped(events_without('category'), 'category_id', 'category__name')
+        ],
+        'tags': [
+            {'id': row['tag_id'], 'name': row['tag__name'], 'count': row['count']}
+            for row in grouped(tag_links, 'tag_id', 'tag__name')
+        ],
+        'city': [
+            {'value': row['city'], 'count': row['count']} for row in grouped(cities, 'city')
+        ],
+        'status': [
+            {'value': row['status'], 'count': row['count']} for row in grouped(events_without('status'), 'status')
+        ],
+    }
+
+
+def order_events(queryset, params):
+    """
+    Apply the `ordering` query parameter, e.g. ``?ordering=-rating``. Rating sorts use the stored
+    aggregates, so they cost nothing beyond the list query itself; unrated events sort last.
+    """
+    ordering = params.get('ordering', None)
+    if not ordering:
+        return queryset
+    descending = ordering.startswith('-')
+    expression = ORDERINGS.get(ordering.lstrip('-'))
+    if expression is None:
+        return queryset
+    expression = expression()
+    expression = expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True)
+    return queryset.order_by(expression, '-id' if descending else 'id')
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from event.benchmark import run_asgi, run_wsgi
+
+
+class Command(BaseCommand):
+    help = "Compare throughput and p99 latency of the sync views on WSGI threads against the async views on ASGI."
+
+    # (name, sync DRF path, async path)
+    ENDPOINTS = [
+        ('event-list', '/events/', '/async/events/'),
+        ('categories', '/categories/', '/async/categories/'),
+        ('tags', '/tags/', '/async/tags/'),
+        ('global-stats', '/events/stats/', None),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Threads (WSGI) or in-flight requests (ASGI).")
+        parser.add_argument('--event-id', type=int, help="Also benchmark retrieve and stats for this event.")
+
+    def handle(self, *args, **options):
+        endpoints = list(self.ENDPOINTS)
+        event_id = options['event_id']
+        if event_id:
+            endpoints += [
+                ('event-retrieve', f'/events/{event_id}/', f'/async/events/{event_id}/'),
+                ('event-stats', f'/events/{event_id}/stats/', f'/async/events/{event_id}/stats/'),
+            ]
+
+        requests, concurrency = options['requests'], options['concurrency']
+        results = []
+        for name, sync_path, async_path in endpoints:
+            # Warm up caches and connections so the first scenario isn't penalised.
+            run_wsgi(sync_path, concurrency, concurrency)
+            results.append({'endpoint': name, 'mode': 'wsgi-threads', 'path': sync_path,
+                            **run_wsgi(sync_path, requests, concurrency)})
+            results.append({'endpoint': name, 'mode': 'asgi-sync-view', 'path': sync_path,
+                            **run_asgi(sync_path, requests, concurrency)})
+            if async_path:
+                run_asgi(async_path, concurrency, concurrency)
+                results.append({'endpoint': name, 'mode': 'asgi-async-view', 'path': async_path,
+                                **run_asgi(async_path, requests, concurrency)})
+
+        self.stdout.write(json.dumps({'requests': requests, 'concurrency': concurrency, 'results': results}, indent=2))
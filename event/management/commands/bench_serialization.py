@@ -0,0 +1,57 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from TBC_final_project.renderers import ORJSONRenderer, ORJSONParser, MessagePackRenderer, MessagePackParser
+from event.async_views import event_queryset
+from event.serializers import EventSerializer
+
+FORMATS = {
+    'drf-json': (JSONRenderer, JSONParser),
+    'orjson': (ORJSONRenderer, ORJSONParser),
+    'msgpack': (MessagePackRenderer, MessagePackParser),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering and parsing of a realistic EventSerializer payload (nested attendees, comments, "
+        "reviews) with the stock DRF JSON renderer, orjson and MessagePack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100, help="Events in the list payload.")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        events = list(event_queryset().order_by('-likes_number')[:options['events']])
+        if not events:
+            raise CommandError("No events found; run `manage.py seed_data` first.")
+
+        started = time.perf_counter()
+        data = EventSerializer(events, many=True).data
+        serialize_ms = (time.perf_counter() - started) * 1000
+
+        report = {'events': len(events), 'serializer_ms': round(serialize_ms, 2), 'formats': {}}
+        for name, (renderer_class, parser_class) in FORMATS.items():
+            renderer, parser = renderer_class(), parser_class()
+            render_times, parse_times = [], []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                body = renderer.render(data, renderer.media_type, {})
+                render_times.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                parser.parse(io.BytesIO(body), parser.media_type, {})
+                parse_times.append(time.perf_counter() - started)
+            report['formats'][name] = {
+                'bytes': len(body),
+                'render_ms': round(statistics.median(render_times) * 1000, 3),
+                'parse_ms': round(statistics.median(parse_times) * 1000, 3),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from event.models import Event
+from event.realtime import LocalBroker, RedisBroker, EventUpdateHub
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many live-update subscribers one worker holds: memory per subscriber, "
+        "messages delivered under a publish burst, and snapshot flush time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=10000)
+        parser.add_argument('--events', type=int, default=10, help="Spread subscribers over this many events.")
+        parser.add_argument('--rate', type=int, default=1000, help="Published changes per second (all events).")
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds to publish for.")
+        parser.add_argument('--interval', type=float, default=0.25, help="Coalescing interval in seconds.")
+        parser.add_argument('--broker', choices=['local', 'redis'], default='local')
+
+    def handle(self, *args, **options):
+        event_ids = list(Event.objects.order_by('id').values_list('id', flat=True)[:options['events']])
+        if not event_ids:
+            raise CommandError("No events found; run `manage.py seed_data` first.")
+        report = asyncio.run(self.run(event_ids, options))
+        self.stdout.write(json.dumps(report, indent=2))
+
+    async def run(self, event_ids, options):
+        broker = LocalBroker() if options['broker'] == 'local' else RedisBroker()
+        hub = EventUpdateHub(broker, options['interval'])
+        received = []
+
+        async def client(subscriber, index):
+            # Stand-in for one SSE connection: count every snapshot that reaches it.
+            while True:
+                snapshot = await subscriber.next(timeout=60)
+                if snapshot is not None:
+                    received[index] += 1
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        subscribers = []
+        clients = []
+        for index in range(options['subscribers']):
+            received.append(0)
+            subscribers.append(hub.subscribe(event_ids[index % len(event_ids)]))
+            clients.append(asyncio.create_task(client(subscribers[-1], index)))
+        await asyncio.sleep(0.5)  # let the clients start waiting and the listener subscribe
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        published = 0
+        started = time.perf_counter()
+        per_tick = max(options['rate'] // 100, 1)
+        while time.perf_counter() - started < options['duration']:
+            for _ in range(per_tick):
+                message = {'event_id': event_ids[published % len(event_ids)], 'kind': 'like'}
+                if options['broker'] == 'redis':
+                    # The Redis client blocks; publish from a thread, as request handlers would.
+                    await asyncio.to_thread(broker.publish, message)
+                else:
+                    broker.publish(message)
+                published += 1
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(options['interval'] * 2)  # drain the last flush
+        elapsed = time.perf_counter() - started
+
+        flush_started = time.perf_counter()
+        hub.dirty.update(event_ids)
+        await hub.flush()
+        flush_ms = (time.perf_counter() - flush_started) * 1000
+
+        for subscriber in subscribers:
+            hub.unsubscribe(subscriber)
+        for task in clients + [hub.task]:
+            task.cancel()
+        await asyncio.gather(*clients, hub.task, return_exceptions=True)
+
+        delivered = sum(received)
+        return {
+            'subscribers': options['subscribers'],
+            'events': len(event_ids),
+            'broker': options['broker'],
+            'interval_s': options['interval'],
+            'published': published,
+            'publish_rate': round(published / elapsed, 1),
+            'delivered': delivered,
+            'messages_per_subscriber_per_s': round(delivered / options['subscribers'] / elapsed, 2),
+            'max_messages_per_subscriber_per_s': round(1 / options['interval'], 2),
+            'flushes': hub.flushes,
+            'flush_ms': round(flush_ms, 3),
+            'memory_per_subscriber_bytes': round((after - before) / options['subscribers']),
+        }
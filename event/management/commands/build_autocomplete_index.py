@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from event.autocomplete import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Resync the Redis autocomplete index (tags, categories, event titles) with the database. "
+        "Safe to run while the site is serving; needed after bulk imports that skip the signals."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = rebuild()
+        for kind, count in counts.items():
+            self.stdout.write(f"{kind}: {count} entries")
+        self.stdout.write(self.style.SUCCESS(f"Index rebuilt in {time.perf_counter() - started:.2f}s"))
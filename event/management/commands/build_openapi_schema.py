@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from TBC_final_project.openapi import write_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into OPENAPI_SCHEMA_DIR (YAML, JSON and a manifest of ETags). "
+        "Run at deploy time, and again whenever the API changes; running processes pick the new "
+        "files up on restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Directory to write to instead of OPENAPI_SCHEMA_DIR.")
+
+    def handle(self, *args, **options):
+        directory = Path(options['output']) if options['output'] else None
+        manifest = write_artifacts(directory)
+        for name in ('yaml', 'json'):
+            entry = manifest[name]
+            self.stdout.write(f"{entry['file']}: {entry['bytes']} bytes, etag {entry['etag']}")
+        self.stdout.write(self.style.SUCCESS(f"Schema generated in {manifest['generation_seconds']}s"))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from event.tag_index import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the Redis tag posting lists used by the tags / tags_all / tags_none filters. "
+        "Until it has run once, tag filters are answered in SQL."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {written} tags in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,121 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event.benchmark import run
+from event.models import Category, Event, EventComment, EventReview, Tag
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main event and user endpoints in-process and report throughput and latency "
+        "percentiles as JSON. Run seed_data first for realistic numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--client', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--only', nargs='*', help="Only run the named endpoints.")
+        parser.add_argument('--label', default='', help="Free-form label stored with the run.")
+        parser.add_argument('--output', help="Append the run as one JSON line to this file.")
+
+    def endpoints(self):
+        """
+        (name, path, authenticated) for every benchmarked endpoint, using the busiest rows in the dataset.
+        """
+        event = Event.objects.order_by('-likes_number').first()
+        if event is None:
+            raise CommandError("No events found; run `manage.py seed_data` first.")
+        category = Category.objects.first()
+        tag = Tag.objects.annotate(n=Count('event')).order_by('-n').first()
+        city = event.city or ''
+
+        return [
+            ('event-list', '/events/', False),
+            ('event-list-query', '/events/?query=festival', False),
+            ('event-list-location', f'/events/?location={city}', False),
+            ('event-list-tags', f'/events/?tags={tag.name}' if tag else '/events/', False),
+            ('event-retrieve', f'/events/{event.id}/', False),
+            ('event-stats', f'/events/{event.id}/stats/', False),
+            ('global-event-stats', '/events/stats/', False),
+            ('event-attendees', f'/events/{event.id}/attendees/', True),
+            ('event-media', f'/events/{event.id}/media/', False),
+            ('event-comments', f'/events/{event.id}/comments/', True),
+            ('event-reviews', f'/events/{event.id}/reviews/', True),
+            ('category-list', '/categories/', False),
+            ('category-detail', f'/categories/{category.id}/', False),
+            ('tag-list', '/tags/', False),
+            ('tag-detail', f'/tags/{tag.id}/' if tag else '/tags/', False),
+            ('my-events', '/my-events/', True),
+            ('my-rsvp-events', '/my-events/rsvp/', True),
+            ('my-liked-events', '/my-events/liked/', True),
+            ('user-profile', '/profile/', True),
+            ('followers', '/followers/', True),
+            ('followings', '/followings/', True),
+        ]
+
+    def bench_user(self):
+        # The most active user makes the "my ..." endpoints representative.
+        return CustomUser.objects.annotate(n=Count('liked_events')).order_by('-n').first()
+
+    def dataset(self):
+        return {
+            'users': CustomUser.objects.count(),
+            'events': Event.objects.count(),
+            'likes': Event.likes.through.objects.count(),
+            'rsvps': Event.attendees.through.objects.count(),
+            'comments': EventComment.objects.count(),
+            'reviews': EventReview.objects.count(),
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        user = self.bench_user()
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(user)}'} if user else {}
+
+        results = []
+        for name, path, authenticated in self.endpoints():
+            if options['only'] and name not in options['only']:
+                continue
+            if authenticated and not auth:
+                continue
+            headers = auth if authenticated else {}
+            # One warm-up round so connection setup and cold caches don't skew the first endpoint.
+            run(path, options['client'], options['concurrency'], options['concurrency'], headers=headers)
+            summary = run(path, options['client'], options['requests'], options['concurrency'], headers=headers)
+            results.append({'endpoint': name, 'path': path, **summary})
+            self.stderr.write(f"{name}: {summary['rps']} req/s, p99 {summary['p99_ms']} ms")
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'label': options['label'],
+            'revision': self.git_revision(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'client': options['client'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'dataset': self.dataset(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'a') as output:
+                output.write(json.dumps(report) + '\n')
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,246 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import CharField, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from redis.exceptions import RedisError
+
+from event import autocomplete, membership, tag_index
+from event.models import Category, Event, EventComment, EventReview, Tag
+from user.models import CustomUser
+
+CITIES = [
+    ('Tbilisi', 'Georgia'), ('Batumi', 'Georgia'), ('Berlin', 'Germany'), ('Paris', 'France'),
+    ('London', 'United Kingdom'), ('New York', 'United States'), ('Tokyo', 'Japan'), ('Madrid', 'Spain'),
+]
+WORDS = [
+    'summit', 'meetup', 'festival', 'workshop', 'conference', 'concert', 'hackathon', 'expo', 'night',
+    'python', 'django', 'music', 'art', 'startup', 'data', 'cloud', 'design', 'food', 'film', 'science',
+]
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a synthetic dataset (users, follows, events, likes, RSVPs, comments, reviews)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=5000, help="Follower edges.")
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--tags-per-event', type=int, default=3)
+        parser.add_argument('--likes', type=int, default=20000)
+        parser.add_argument('--rsvps', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--replies', type=int, default=5000, help="Replies to the generated comments.")
+        parser.add_argument('--reviews', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, so runs are reproducible.")
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        # Rows from earlier runs are left alone; names are suffixed with the run's starting user id.
+        self.run_id = (CustomUser.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            category_ids = self.create_named('categories', Category, 'category', options['categories'])
+            tag_ids = self.create_named('tags', Tag, 'tag', options['tags'])
+            event_ids = self.create_events(options['events'], user_ids, category_ids)
+
+            self.create_pairs(
+                'follows', CustomUser.followers.through, 'from_customuser_id', 'to_customuser_id',
+                user_ids, user_ids, options['follows'], skip_self=True,
+            )
+            self.create_pairs(
+                'event tags', Event.tags.through, 'event_id', 'tag_id',
+                event_ids, tag_ids, min(options['tags_per_event'] * len(event_ids), len(event_ids) * len(tag_ids)),
+            )
+            self.create_pairs(
+                'likes', Event.likes.through, 'event_id', 'customuser_id',
+                event_ids, user_ids, options['likes'],
+            )
+            self.create_pairs(
+                'RSVPs', Event.attendees.through, 'event_id', 'customuser_id',
+                event_ids, user_ids, options['rsvps'],
+            )
+            self.create_comments(options['comments'], options['replies'], event_ids, user_ids)
+            self.create_reviews(options['reviews'], event_ids, user_ids)
+            self.update_counters(event_ids)
+
+        self.rebuild_indexes(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Dataset generated in {time.perf_counter() - started:.2f}s"))
+
+    def rebuild_indexes(self, user_ids):
+        """
+        bulk_create and the raw m2m inserts skip the signals that keep the Redis indexes in step, so
+        rebuild them from the new rows.
+        """
+        started = time.perf_counter()
+        try:
+            autocomplete.rebuild()
+            tag_index.rebuild()
+            # The ids may have been used before the database was reset; drop any sets left in Redis.
+            membership.reset(user_ids)
+        except RedisError as exc:
+            self.stderr.write(self.style.WARNING(
+                f"  Redis indexes not rebuilt ({exc}); run build_autocomplete_index and build_tag_index."
+            ))
+            return
+        self.stdout.write(f"  Redis indexes: rebuilt in {time.perf_counter() - started:.2f}s")
+
+    def bulk_create(self, label, model, objects):
+        started = time.perf_counter()
+        first_id = (model.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.stdout.write(f"  {label}: {len(objects)} rows in {time.perf_counter() - started:.2f}s")
+        return list(model.objects.filter(id__gte=first_id).values_list('id', flat=True))
+
+    def create_users(self, count):
+        # Hashing is deliberately slow; every seeded user shares the password "password".
+        password = make_password('password')
+        return self.bulk_create('users', CustomUser, [
+            CustomUser(
+                email=f'user{self.run_id}_{i}@example.com',
+                username=f'user{self.run_id}_{i}',
+                password=password,
+            )
+            for i in range(count)
+        ])
+
+    def create_named(self, label, model, prefix, count):
+        return self.bulk_create(label, model, [
+            model(name=f'{prefix}-{self.run_id}-{i}') for i in range(count)
+        ])
+
+    def create_events(self, count, user_ids, category_ids):
+        if not user_ids or not category_ids:
+            return []
+        today = date.today()
+        events = []
+        for i in range(count):
+            start = today + timedelta(days=self.random.randint(-60, 180))
+            city, country = self.random.choice(CITIES)
+            events.append(Event(
+                title=' '.join(self.random.sample(WORDS, 3)).title() + f' {i}',
+                description=' '.join(self.random.choices(WORDS, k=30)),
+                start_date=start,
+                end_date=start + timedelta(days=self.random.randint(0, 3)),
+                location=f'{self.random.randint(1, 200)} Main Street, {city}',
+                city=city,
+                country=country,
+                organizer_id=self.random.choice(user_ids),
+                category_id=self.random.choice(category_ids),
+                is_online=self.random.random() < 0.2,
+                capacity=self.random.choice([None, 50, 100, 500, 5000]),
+                price=Decimal(self.random.randint(0, 20000)) / 100,
+            ))
+        return self.bulk_create('events', Event, events)
+
+    def sample_pairs(self, left_ids, right_ids, count, skip_self=False):
+        """
+        Draw ``count`` distinct (left, right) pairs without materialising the full cross product.
+        """
+        total = len(left_ids) * len(right_ids)
+        count = min(count, total)
+        if not count:
+            return []
+        pairs = []
+        for index in self.random.sample(range(total), count):
+            left, right = left_ids[index // len(right_ids)], right_ids[index % len(right_ids)]
+            if skip_self and left == right:
+                continue
+            pairs.append((left, right))
+        return pairs
+
+    def create_pairs(self, label, through, left_field, right_field, left_ids, right_ids, count, skip_self=False):
+        """
+        Insert through-table rows with executemany: building a model instance per row costs more
+        than the insert itself, and these tables are the bulk of the dataset.
+        """
+        pairs = self.sample_pairs(left_ids, right_ids, count, skip_self=skip_self)
+        started = time.perf_counter()
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s) ON CONFLICT DO NOTHING'.format(
+            quote(through._meta.db_table),
+            quote(through._meta.get_field(left_field).column),
+            quote(through._meta.get_field(right_field).column),
+        )
+        with connection.cursor() as cursor:
+            for offset in range(0, len(pairs), self.batch_size):
+                cursor.executemany(sql, pairs[offset:offset + self.batch_size])
+        self.stdout.write(f"  {label}: {len(pairs)} rows in {time.perf_counter() - started:.2f}s")
+        return pairs
+
+    def create_comments(self, count, reply_count, event_ids, user_ids):
+        if not event_ids or not user_ids:
+            return []
+        comment_ids = self.bulk_create('comments', EventComment, [
+            EventComment(
+                event_id=self.random.choice(event_ids),
+                user_id=self.random.choice(user_ids),
+                content=' '.join(self.random.choices(WORDS, k=12)),
+            )
+            for _ in range(count)
+        ])
+        if not comment_ids:
+            return []
+        # bulk_create skips EventComment.save(), so fill in the materialized paths with set-based updates.
+        own_segment = Concat(
+            LPad(Cast('id', output_field=CharField()), 10, Value('0')), Value('/'), output_field=CharField(),
+        )
+        EventComment.objects.filter(id__gte=min(comment_ids)).update(path=own_segment)
+
+        parents = list(EventComment.objects.filter(id__in=self.random.sample(
+            comment_ids, min(len(comment_ids), 1000))).values_list('id', 'event_id'))
+        reply_ids = self.bulk_create('replies', EventComment, [
+            EventComment(
+                event_id=event_id,
+                parent_id=parent_id,
+                depth=1,
+                user_id=self.random.choice(user_ids),
+                content=' '.join(self.random.choices(WORDS, k=8)),
+            )
+            for parent_id, event_id in self.random.choices(parents, k=reply_count)
+        ])
+        if reply_ids:
+            replies = EventComment.objects.filter(id__gte=min(reply_ids))
+            parent_path = EventComment.objects.filter(pk=OuterRef('parent_id')).values('path')
+            replies.update(path=Concat(Subquery(parent_path), own_segment, output_field=CharField()))
+            reply_counts = EventComment.objects.filter(parent_id=OuterRef('pk')).order_by().values('parent_id')
+            EventComment.objects.filter(id__in=[parent_id for parent_id, _ in parents]).update(
+                reply_count=Coalesce(Subquery(reply_counts.annotate(n=Count('id')).values('n')), Value(0)),
+            )
+        return comment_ids + reply_ids
+
+    def create_reviews(self, count, event_ids, user_ids):
+        return self.bulk_create('reviews', EventReview, [
+            EventReview(
+                event_id=event_id,
+                user_id=user_id,
+                rating=self.random.randint(1, 5),
+                content=' '.join(self.random.choices(WORDS, k=8)),
+            )
+            for event_id, user_id in self.sample_pairs(event_ids, user_ids, count)
+        ])
+
+    def update_counters(self, event_ids):
+        """
+        Bring denormalised counters in line with the generated rows in one statement.
+        """
+        if not event_ids:
+            return
+        # New ids are contiguous, and a range keeps the statement clear of SQLite's variable limit.
+        events = Event.objects.filter(id__gte=min(event_ids))
+        likes = Event.likes.through.objects.filter(event_id=OuterRef('pk')).order_by().values('event_id')
+        events.update(
+            likes_number=Coalesce(Subquery(likes.annotate(n=Count('id')).values('n')), Value(0)),
+            **Event.rating_aggregate_expressions(),
+        )
@@ -0,0 +1,31 @@
+"""
+Work on stored files, routed to the `media` queue (CELERY_TASK_ROUTES) so slow storage calls never hold
+up the bulk worker's purges and emails.
+"""
+import logging
+
+from celery import shared_task
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# A failed delete is retried this many times, STORAGE_RETRY_DELAY seconds apart and doubling each time.
+STORAGE_MAX_RETRIES = 5
+STORAGE_RETRY_DELAY = 30
+
+
+@shared_task(bind=True, max_retries=STORAGE_MAX_RETRIES)
+def delete_stored_files(self, names):
+    """
+    Delete ``names`` from the default storage. Missing files are skipped, so a retry or a repeated
+    purge is harmless; a retry only covers the files still left.
+    """
+    remaining = []
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            remaining.append(name)
+    if remaining:
+        logger.warning("could not delete stored files", extra={'files': len(remaining)})
+        raise self.retry(args=[remaining], countdown=STORAGE_RETRY_DELAY * (2 ** self.request.retries))
@@ -0,0 +1,215 @@
+"""
+Per-user sets of liked and attended event ids.
+
+Redis keeps ``membership:<relation>:<user_id>`` as a set of event ids, loaded from the m2m table on
+first use and then kept in sync by the like and RSVP signals (event/signals.py). The set always
+contains SENTINEL (0, never an event id), which marks it as loaded: a set that expired, or was created
+by a write before it was ever loaded, is reloaded from the database in full.
+
+They give list payloads their ``is_liked`` / ``is_attending`` flags with one pipelined SMISMEMBER per
+page and no SQL, and back the paginated "my events" pages. Each user also has a version counter,
+bumped on every change, that goes into their list ETag.
+"""
+import logging
+
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'membership'
+SENTINEL = 0
+TIMEOUT = 24 * 3600
+LOAD_ATTEMPTS = 3
+
+# relation -> m2m through model (fields: event, customuser)
+RELATIONS = {
+    'liked': Event.likes.through,
+    'attending': Event.attendees.through,
+}
+
+
+def set_key(relation, user_id):
+    return f'{KEY_PREFIX}:{relation}:{user_id}'
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def load(client, relation, user_id):
+    """
+    Replace the set with the user's rows from the database; returns the event ids.
+
+    A change that commits while the rows are read could have its SADD wiped by the replace, so the
+    write is skipped (and the read retried) when the user's version moved in the meantime.
+    """
+    for _ in range(LOAD_ATTEMPTS):
+        before = client.get(version_key(user_id))
+        ids = set(RELATIONS[relation].objects.filter(customuser_id=user_id).values_list('event_id', flat=True))
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(version_key(user_id))
+                if pipe.get(version_key(user_id)) != before:
+                    continue
+                pipe.multi()
+                pipe.delete(set_key(relation, user_id))
+                pipe.sadd(set_key(relation, user_id), SENTINEL, *ids)
+                pipe.expire(set_key(relation, user_id), TIMEOUT)
+                pipe.execute()
+                return ids
+            except WatchError:
+                continue
+    # Still changing: answer from the database and leave the set for the next read to load.
+    return ids
+
+
+class Members:
+    """
+    The user's event ids in one relation, newest (highest id) first, for a Paginator: count() and
+    slicing each read only what they need (SCARD, and SORT ... LIMIT for one page of ids).
+    """
+
+    def __init__(self, relation, user_id):
+        self.relation = relation
+        self.user_id = user_id
+
+    def rows(self):
+        return RELATIONS[self.relation].objects.filter(customuser_id=self.user_id)
+
+    def loaded(self, client):
+        """
+        Whether the set is loaded, loading it first if need be (load() gives up while the user's
+        rows keep changing, and the caller then answers from the database).
+        """
+        key = set_key(self.relation, self.user_id)
+        if not client.sismember(key, SENTINEL):
+            load(client, self.relation, self.user_id)
+            return bool(client.sismember(key, SENTINEL))
+        return True
+
+    def count(self):
+        try:
+            client = get_redis_connection('default')
+            if self.loaded(client):
+                # Minus the sentinel.
+                return client.scard(set_key(self.relation, self.user_id)) - 1
+        except RedisError:
+            logger.warning("membership sets unavailable", extra={'relation': self.relation, 'user_id': self.user_id})
+        return self.rows().count()
+
+    def __getitem__(self, page):
+        start, stop = page.start or 0, page.stop
+        try:
+            client = get_redis_connection('default')
+            if self.loaded(client):
+                # The sentinel sorts last, so only a slice past count() reaches it.
+                ids = client.sort(set_key(self.relation, self.user_id), start=start, num=stop - start, desc=True)
+                return [int(pk) for pk in ids if int(pk) != SENTINEL]
+        except RedisError:
+            logger.warning("membership sets unavailable", extra={'relation': self.relation, 'user_id': self.user_id})
+        return list(self.rows().order_by('-event_id').values_list('event_id', flat=True)[start:stop])
+
+
+def flags(user_id, ids):
+    """
+    {relation: ids from ``ids`` in the user's set} for every relation, in one round trip.
+    """
+    ids = list(ids)
+    if not ids:
+        return {relation: set() for relation in RELATIONS}
+    try:
+        client = get_redis_connection('default')
+        pipe = client.pipeline(transaction=False)
+        for relation in RELATIONS:
+            pipe.smismember(set_key(relation, user_id), [SENTINEL, *ids])
+        result = {}
+        for relation, found in zip(RELATIONS, pipe.execute()):
+            if found[0]:
+                result[relation] = {pk for pk, present in zip(ids, found[1:]) if present}
+            else:
+                result[relation] = load(client, relation, user_id).intersection(ids)
+        return result
+    except RedisError:
+        logger.warning("membership sets unavailable", extra={'user_id': user_id})
+        return {
+            relation: set(through.objects.filter(customuser_id=user_id, event_id__in=ids)
+                          .values_list('event_id', flat=True))
+            for relation, through in RELATIONS.items()
+        }
+
+
+def version(user_id):
+    """
+    The user's change counter, or None when Redis can't be reached.
+    """
+    try:
+        return int(get_redis_connection('default').get(version_key(user_id)) or 0)
+    except RedisError:
+        return None
+
+
+def update(relation, pairs, add):
+    """
+    Add (or remove) ``(user_id, event_id)`` pairs. A set that isn't loaded is left for load() to fill.
+    One MULTI, so load() sees each set change together with its version bump.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    pipe = get_redis_connection('default').pipeline(transaction=True)
+    for user_id, event_id in pairs:
+        if add:
+            pipe.sadd(set_key(relation, user_id), event_id)
+        else:
+            pipe.srem(set_key(relation, user_id), event_id)
+    for user_id in {user_id for user_id, _ in pairs}:
+        # No expiry: a counter that restarted could repeat an ETag a client still holds.
+        pipe.incr(version_key(user_id))
+    pipe.execute()
+
+
+def reset(user_ids):
+    """
+    Drop the users' sets, so the next read loads them from the database, and bump their versions.
+    For writes that skip the signals, such as bulk seeding.
+    """
+    pipe = get_redis_connection('default').pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.delete(*(set_key(relation, user_id) for relation in RELATIONS))
+        pipe.incr(version_key(user_id))
+    pipe.execute()
+
+
+def schedule_update(relation, pairs, add):
+    """
+    Apply ``update`` once the current transaction commits. Never raises: after a failed update the
+    sets are at most TIMEOUT old before they are reloaded.
+    """
+    pairs = list(pairs)
+
+    def run():
+        try:
+            update(relation, pairs, add)
+        except RedisError:
+            logger.warning("membership update failed", extra={'relation': relation, 'pairs': len(pairs)})
+
+    transaction.on_commit(run)
+
+
+def annotate(rows, user):
+    """
+    Copies of serialized event ``rows`` with ``is_liked`` and ``is_attending`` for ``user``.
+    The rows themselves may be shared (cached), so they are never modified.
+    """
+    if user is None or not user.is_authenticated:
+        found = {relation: set() for relation in RELATIONS}
+    else:
+        found = flags(user.pk, [row['id'] for row in rows])
+    return [
+        {**row, 'is_liked': row['id'] in found['liked'], 'is_attending': row['id'] in found['attending']}
+        for row in rows
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def backfill_paths(apps, schema_editor):
+    # Every existing comment is top level, so its path is just its own segment.
+    EventComment = apps.get_model('event', 'EventComment')
+    EventComment.objects.update(path=Concat(
+        LPad(Cast('id', output_field=CharField()), 10, Value('0')), Value('/'), output_field=CharField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0002_likeevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventcomment',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='event.eventcomment'),
+        ),
+        migrations.AddField(
+            model_name='eventcomment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=231),
+        ),
+        migrations.AddField(
+            model_name='eventcomment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='eventcomment',
+            index=models.Index(fields=['event', 'parent', '-id'], name='comment_event_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventcomment',
+            index=models.Index(fields=['path'], name='comment_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:51
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def clean_existing_reviews(apps, schema_editor):
+    # Reviews posted before validation existed may repeat per user and event or be out of range:
+    # keep each user's latest review of an event and clamp ratings into 1..5.
+    EventReview = apps.get_model('event', 'EventReview')
+    duplicates = (
+        EventReview.objects.values('user_id', 'event_id')
+        .annotate(n=Count('id'), latest=Max('id'))
+        .filter(n__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        EventReview.objects.filter(user_id=duplicate['user_id'], event_id=duplicate['event_id']).exclude(
+            id=duplicate['latest']
+        ).delete()
+    EventReview.objects.filter(rating__lt=1).update(rating=1)
+    EventReview.objects.filter(rating__gt=5).update(rating=5)
+
+
+def backfill_aggregates(apps, schema_editor):
+    Event = apps.get_model('event', 'Event')
+    EventReview = apps.get_model('event', 'EventReview')
+
+    def aggregate(expression, **filters):
+        reviews = EventReview.objects.filter(event_id=OuterRef('pk'), **filters).order_by().values('event_id')
+        return Coalesce(Subquery(reviews.annotate(value=expression).values('value')), Value(0))
+
+    updates = {'rating_count': aggregate(Count('id')), 'rating_sum': aggregate(Sum('rating'))}
+    for rating in range(1, 6):
+        updates[f'rating_{rating}'] = aggregate(Count('id'), rating=rating)
+    Event.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_threaded_comments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='eventreview',
+            name='rating',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(clean_existing_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventreview',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='unique_review_per_user_event'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventreview',
+            constraint=models.CheckConstraint(condition=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='review_rating_range'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
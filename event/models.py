@@ -1,4 +1,7 @@
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Lower, NullIf
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
@@ -22,6 +25,15 @@ class Tag(models.Model):
         return self.name
 
 
+class EventManager(models.Manager):
+    """
+    Hides soft-deleted events; they stay in the table only until the purge task removes them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Event(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -38,6 +50,7 @@ class Event(models.Model):
     status = models.CharField(max_length=10, choices=[
         ('scheduled', 'Scheduled'),
         ('ongoing', 'Ongoing'),
+        ('completed', 'Completed'),
         ('canceled', 'Canceled'),
     ], default='scheduled')
     attendees = models.ManyToManyField(CustomUser, blank=True, related_name='attendees')
@@ -50,10 +63,121 @@ class Event(models.Model):
     featured = models.BooleanField(default=False)
     likes_number = models.PositiveIntegerField(default=0)
     likes = models.ManyToManyField(CustomUser, blank=True, related_name='liked_events')
+    # Review aggregates, kept in step with EventReview rows (see EventReview.save and event/signals.py)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped (with updated_at) whenever anything shown with the event changes; feeds the HTTP validators
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Set by EventDeleteAPIView; event.tasks.purge_event then removes the rows in batches
+    is_deleted = models.BooleanField(default=False, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EventManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Lifecycle jobs (event/tasks.py) select due events by status and start date.
+            models.Index(fields=['status', 'start_date'], name='event_status_start_idx'),
+            models.Index(fields=['deleted_at'], condition=Q(is_deleted=True), name='event_deleted_idx'),
+            # Admin title search is a prefix range on LOWER(title) (user/search.py).
+            models.Index(Lower('title'), name='event_title_lower_idx'),
+        ]
+
+    # Kept up to date with queryset updates (F() counters, bump_version, soft delete), never through an
+    # instance: saving an event leaves them alone so it can't write back the values it read earlier.
+    QUERYSET_MAINTAINED_FIELDS = {
+        'likes_number', 'rating_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+        'version', 'is_deleted', 'deleted_at',
+    }
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = self.QUERYSET_MAINTAINED_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def registration_open(self):
+        if self.status not in ('scheduled', 'ongoing'):
+            return False
+        return self.registration_deadline is None or timezone.now() <= self.registration_deadline
+
+    @classmethod
+    def bump_version(cls, event_ids):
+        """
+        Mark events as changed after a write to a child row (like, RSVP, comment, review, media, tag).
+        """
+        cls.objects.filter(pk__in=event_ids).update(version=F('version') + 1, updated_at=timezone.now())
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+    @property
+    def rating_histogram(self):
+        return {rating: getattr(self, f'rating_{rating}') for rating in range(1, 6)}
+
+    @staticmethod
+    def average_rating_expression():
+        """
+        Average rating computed from the stored aggregates (NULL when unrated), for ordering in SQL.
+        """
+        return F('rating_sum') * 1.0 / NullIf(F('rating_count'), 0)
+
+    @classmethod
+    def apply_rating_change(cls, event_id, added=None, removed=None):
+        """
+        Adjust the aggregates for a review whose rating went from ``removed`` to ``added``
+        (either may be None for a create or a delete) with one atomic UPDATE.
+        """
+        if added == removed:
+            return
+        updates = {}
+        count_delta = sum_delta = 0
+        if added:
+            count_delta += 1
+            sum_delta += added
+            updates[f'rating_{added}'] = F(f'rating_{added}') + 1
+        if removed:
+            count_delta -= 1
+            sum_delta -= removed
+            updates[f'rating_{removed}'] = F(f'rating_{removed}') - 1
+        if count_delta:
+            updates['rating_count'] = F('rating_count') + count_delta
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+        cls.objects.filter(pk=event_id).update(**updates)
+
+    @staticmethod
+    def rating_aggregate_expressions():
+        """
+        UPDATE expressions that recompute every rating aggregate from the review rows.
+        """
+        def aggregate(expression, **filters):
+            reviews = EventReview.objects.filter(event_id=OuterRef('pk'), **filters).order_by().values('event_id')
+            return Coalesce(Subquery(reviews.annotate(value=expression).values('value')), Value(0))
+
+        expressions = {
+            'rating_count': aggregate(Count('id')),
+            'rating_sum': aggregate(models.Sum('rating')),
+        }
+        for rating in range(1, 6):
+            expressions[f'rating_{rating}'] = aggregate(Count('id'), rating=rating)
+        return expressions
+
 
 class EventMedia(models.Model):
     event = models.ForeignKey(Event, related_name='media', on_delete=models.CASCADE)
@@ -66,29 +190,100 @@ class EventMedia(models.Model):
 
 
 class EventComment(models.Model):
+    # Replies nest up to MAX_DEPTH levels; each level adds one PATH_SEGMENT_LENGTH segment to `path`.
+    MAX_DEPTH = 20
+    PATH_SEGMENT_LENGTH = 11
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     event = models.ForeignKey(Event, related_name="comments", on_delete=models.CASCADE)
+    parent = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
+    # Materialized path of zero-padded ids ("0000000012/0000000040/"), so a whole thread is one range scan
+    path = models.CharField(max_length=(MAX_DEPTH + 1) * PATH_SEGMENT_LENGTH, editable=False, default='')
+    depth = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)  # direct replies only
     content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'parent', '-id'], name='comment_event_parent_idx'),
+            models.Index(fields=['path'], name='comment_path_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.event.title}"
 
+    @staticmethod
+    def path_segment(pk):
+        return f"{pk:010d}/"
+
+    @staticmethod
+    def first_page_cache_key(event_id):
+        return f"event:{event_id}:comments:first"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # The path needs the new primary key, so insert first and fill it in within the same transaction.
+        with transaction.atomic():
+            parent_path = ''
+            if self.parent_id:
+                parent_path, parent_depth = EventComment.objects.filter(pk=self.parent_id).values_list(
+                    'path', 'depth').get()
+                self.depth = parent_depth + 1
+            super().save(*args, **kwargs)
+            self.path = parent_path + self.path_segment(self.pk)
+            EventComment.objects.filter(pk=self.pk).update(path=self.path)
+            if self.parent_id:
+                EventComment.objects.filter(pk=self.parent_id).update(reply_count=F('reply_count') + 1)
+
+    def thread(self):
+        """
+        This comment and all of its replies in depth-first order, as one indexed range query.
+        """
+        # Every descendant path starts with self.path, i.e. sorts between it and the same prefix ending in '0'.
+        upper_bound = self.path[:-1] + '0'
+        return EventComment.objects.filter(path__gte=self.path, path__lt=upper_bound).order_by('path')
+
 
 class EventReview(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     event = models.ForeignKey(Event, related_name="reviews", on_delete=models.CASCADE)
-    rating = models.PositiveIntegerField()  # Rating between 1 and 5
+    rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     content = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='unique_review_per_user_event'),
+            models.CheckConstraint(condition=Q(rating__gte=1, rating__lte=5), name='review_rating_range'),
+        ]
+
     def __str__(self):
         return f"Review by {self.user.username} on {self.event.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rating so save() can move the event aggregates by the difference.
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
+
     def clean(self):
         if self.rating < 1 or self.rating > 5:
             raise ValidationError('Rating must be between 1 and 5.')
 
+    def save(self, *args, **kwargs):
+        removed = None if self._state.adding else getattr(self, '_stored_rating', None)
+        if removed is None and not self._state.adding:
+            # Loaded with the rating deferred; read what is stored now.
+            removed = EventReview.objects.filter(pk=self.pk).values_list('rating', flat=True).first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Event.apply_rating_change(self.event_id, added=self.rating, removed=removed)
+        self._stored_rating = self.rating
+
 
 class LikeEvent(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -0,0 +1,249 @@
+"""
+Live event counters pushed to clients over Server-Sent Events.
+
+Write paths call ``publish_event_change`` (through the receivers in event/signals.py), which puts a
+tiny "event N changed" message on a pub/sub broker: Redis in production, or an in-process stand-in
+(REALTIME_BROKER = 'local') for a single worker and for benchmarks.
+
+Every worker runs one EventUpdateHub per event loop. The hub only marks events dirty as messages
+arrive; every REALTIME_COALESCE_INTERVAL seconds it loads fresh counters for all dirty events in one
+query and hands them to the subscribers, each of which keeps only the newest snapshot. A burst of a
+thousand likes a second therefore reaches a subscriber as at most 1 / interval messages a second.
+"""
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Event, EventComment
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'events:updates'
+
+
+class LocalBroker:
+    """
+    In-process stand-in for Redis pub/sub: delivers to listeners in this process only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listeners = set()
+
+    def publish(self, message):
+        with self.lock:
+            listeners = list(self.listeners)
+        for loop, callback in listeners:
+            # Publishers run in request threads; hand the message to the listener's loop.
+            loop.call_soon_threadsafe(callback, message)
+
+    async def listen(self, callback):
+        listener = (asyncio.get_running_loop(), callback)
+        with self.lock:
+            self.listeners.add(listener)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            with self.lock:
+                self.listeners.discard(listener)
+
+
+class RedisBroker:
+    """
+    Redis pub/sub on a single channel shared by all events.
+    """
+
+    def publish(self, message):
+        get_redis_connection('default').publish(CHANNEL, json.dumps(message))
+
+    async def listen(self, callback):
+        while True:
+            client = aioredis.from_url(settings.REALTIME_REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            callback(json.loads(message['data']))
+            except (RedisError, OSError) as exc:
+                logger.warning("realtime subscription lost, retrying", extra={'error': str(exc)})
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = LocalBroker() if settings.REALTIME_BROKER == 'local' else RedisBroker()
+    return _broker
+
+
+def publish_event_change(event_id, kind):
+    """
+    Tell subscribers that an event's counters changed. Never raises: live updates are best effort.
+    """
+    try:
+        get_broker().publish({'event_id': event_id, 'kind': kind})
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning("realtime publish failed", extra={'event_id': event_id, 'error': str(exc)})
+
+
+def snapshot_queryset(event_ids):
+    """
+    Current counters for ``event_ids`` in one query (counts via correlated subqueries, no join fan-out).
+    """
+    rsvps = (
+        Event.attendees.through.objects.filter(event_id=OuterRef('pk')).order_by().values('event_id')
+        .annotate(n=Count('id')).values('n')
+    )
+    comments = (
+        EventComment.objects.filter(event_id=OuterRef('pk')).order_by().values('event_id')
+        .annotate(n=Count('id')).values('n')
+    )
+    return Event.objects.filter(id__in=event_ids).annotate(
+        rsvp_count=Coalesce(Subquery(rsvps), Value(0)),
+        comment_count=Coalesce(Subquery(comments), Value(0)),
+    ).values('id', 'status', 'likes_number', 'rsvp_count', 'comment_count', 'rating_count', 'rating_sum')
+
+
+async def fetch_snapshots(event_ids):
+    snapshots = {}
+    async for row in snapshot_queryset(event_ids):
+        rating_count = row.pop('rating_count')
+        rating_sum = row.pop('rating_sum')
+        row['average_rating'] = round(rating_sum / rating_count, 2) if rating_count else None
+        snapshots[row['id']] = row
+    return snapshots
+
+
+class Subscriber:
+    """
+    One connected client. Holds at most one undelivered snapshot; newer snapshots replace it.
+    """
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.pending = None
+        self.ready = asyncio.Event()
+
+    def offer(self, snapshot):
+        self.pending = snapshot
+        self.ready.set()
+
+    async def next(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for a snapshot; returns None on timeout.
+        """
+        # asyncio.wait rather than wait_for: wait_for can swallow a cancellation that lands just as the
+        # event fires, which would leave a disconnected client's stream running.
+        waiter = asyncio.ensure_future(self.ready.wait())
+        try:
+            await asyncio.wait((waiter,), timeout=timeout)
+        finally:
+            waiter.cancel()
+        if not self.ready.is_set():
+            return None
+        self.ready.clear()
+        snapshot, self.pending = self.pending, None
+        return snapshot
+
+
+class EventUpdateHub:
+    """
+    Fans broker messages out to the subscribers in this event loop, coalesced per interval.
+    """
+
+    def __init__(self, broker, interval):
+        self.broker = broker
+        self.interval = interval
+        self.subscribers = defaultdict(set)
+        self.dirty = set()
+        self.task = None
+        self.flushes = 0
+
+    def subscribe(self, event_id):
+        subscriber = Subscriber(event_id)
+        self.subscribers[event_id].add(subscriber)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscribers = self.subscribers.get(subscriber.event_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.event_id]
+
+    def on_message(self, message):
+        event_id = message.get('event_id')
+        if event_id in self.subscribers:
+            self.dirty.add(event_id)
+
+    async def run(self):
+        listener = asyncio.create_task(self.broker.listen(self.on_message))
+        try:
+            # Stops with the last subscriber; the next subscribe() starts a fresh loop.
+            while self.subscribers:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            listener.cancel()
+
+    async def flush(self):
+        dirty, self.dirty = self.dirty & self.subscribers.keys(), set()
+        if not dirty:
+            return
+        try:
+            snapshots = await fetch_snapshots(dirty)
+        except Exception:
+            logger.exception("realtime snapshot failed", extra={'event_ids': sorted(dirty)})
+            return
+        self.flushes += 1
+        for event_id, snapshot in snapshots.items():
+            for subscriber in self.subscribers.get(event_id, ()):
+                subscriber.offer(snapshot)
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = EventUpdateHub(get_broker(), settings.REALTIME_COALESCE_INTERVAL)
+    return hub
+
+
+def format_sse(data, event='stats'):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(event_id, initial):
+    """
+    SSE body: the initial counters, then coalesced updates, with keep-alive comments while idle.
+    """
+    hub = get_hub()
+    subscriber = hub.subscribe(event_id)
+    try:
+        yield format_sse(initial)
+        while True:
+            snapshot = await subscriber.next(settings.REALTIME_KEEPALIVE_SECONDS)
+            yield format_sse(snapshot) if snapshot is not None else ": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
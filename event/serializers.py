@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from user.models import CustomUser
+from .batch import MAX_OPERATIONS, OPERATIONS
 from .models import Event, Category, Tag, EventMedia, EventComment, EventReview, LikeEvent
 
 
@@ -29,13 +30,23 @@ class EventMediaSerializer(serializers.ModelSerializer):
 
 
 class EventCommentSerializer(serializers.ModelSerializer):
+    # Querysets feeding this serializer should select_related('user', 'event').
     user = serializers.StringRelatedField(read_only=True)
     event = serializers.StringRelatedField(read_only=True)
+    parent = serializers.PrimaryKeyRelatedField(queryset=EventComment.objects.all(), required=False, allow_null=True)
 
     class Meta:
         model = EventComment
-        fields = ['id', 'user', 'event', 'content', 'created_at']
-        read_only_fields = ['id', 'user', 'event', 'created_at']
+        fields = ['id', 'user', 'event', 'parent', 'depth', 'reply_count', 'content', 'created_at']
+        read_only_fields = ['id', 'user', 'event', 'depth', 'reply_count', 'created_at']
+
+    def validate_parent(self, parent):
+        event = self.context.get('event')
+        if parent is not None and event is not None and parent.event_id != event.id:
+            raise serializers.ValidationError("You can only reply to a comment on the same event.")
+        if parent is not None and parent.depth + 1 > EventComment.MAX_DEPTH:
+            raise serializers.ValidationError("This thread is nested too deeply to reply to.")
+        return parent
 
 
 class EventReviewSerializer(serializers.ModelSerializer):
@@ -55,14 +66,17 @@ class EventSerializer(serializers.ModelSerializer):
     reviews = EventReviewSerializer(many=True, read_only=True)
     comments = EventCommentSerializer(many=True, read_only=True)
     attendees = UserSerializer(many=True, read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'description', 'start_date', 'end_date', 'location', 'status', 'category', 'tags',
-            'likes_number', 'attendees', 'media', 'reviews', 'comments'
+            'likes_number', 'rating_count', 'average_rating', 'rating_histogram',
+            'attendees', 'media', 'reviews', 'comments'
         ]
-        read_only_fields = ['attendees', 'likes_number', 'media', 'reviews', 'comments', 'organizer']
+        read_only_fields = ['attendees', 'likes_number', 'rating_count', 'media', 'reviews', 'comments', 'organizer']
 
     def create(self, validated_data):
         category_data = validated_data.pop('category')
@@ -101,6 +115,18 @@ class EventSerializer(serializers.ModelSerializer):
         return instance
 
 
+class EventListSerializer(EventSerializer):
+    """
+    EventSerializer for list pages: attendees and comments grow without bound, so they are left to
+    the detail view.
+    """
+    attendees = None
+    comments = None
+
+    class Meta(EventSerializer.Meta):
+        fields = [field for field in EventSerializer.Meta.fields if field not in ('attendees', 'comments')]
+
+
 class EventMediaUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventMedia
@@ -120,3 +146,12 @@ class LikeEventSerializer(serializers.ModelSerializer):
 
 
 
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=list(OPERATIONS))
+    id = serializers.IntegerField(min_value=1)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
@@ -0,0 +1,182 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from TBC_final_project import async_cache
+from TBC_final_project.caching import reference_data
+
+from . import autocomplete, membership, tag_index
+from .async_views import REFERENCE_LIST_KEYS
+from .models import Category, Event, EventComment, EventMedia, EventReview, Tag
+from .realtime import publish_event_change
+
+
+def event_ids_from_m2m(instance, pk_set):
+    """
+    Affected event ids for an m2m_changed signal sent from either side of an Event relation.
+    """
+    if isinstance(instance, Event):
+        return [instance.pk]
+    return list(pk_set or ())
+
+
+def notify_live(event_ids, kind):
+    for event_id in event_ids:
+        transaction.on_commit(lambda event_id=event_id: publish_event_change(event_id, kind))
+
+
+def drop_first_comment_page(event_id):
+    # After commit: dropped earlier, a concurrent reader could cache the page without the new path and
+    # reply_count (EventComment.save fills them in after this signal) until the entry expires.
+    transaction.on_commit(lambda: cache.delete(EventComment.first_page_cache_key(event_id)))
+
+
+@receiver(post_save, sender=EventComment)
+def comment_saved(sender, instance, created, **kwargs):
+    # New top-level comments and new replies (reply_count) both change the cached first page.
+    drop_first_comment_page(instance.event_id)
+    Event.bump_version([instance.event_id])
+    if created:
+        notify_live([instance.event_id], 'comment')
+
+
+@receiver(post_delete, sender=EventComment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.parent_id:
+        # No-op when the parent is being deleted in the same cascade.
+        EventComment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(
+            reply_count=F('reply_count') - 1
+        )
+    drop_first_comment_page(instance.event_id)
+    Event.bump_version([instance.event_id])
+    notify_live([instance.event_id], 'comment')
+
+
+@receiver(post_delete, sender=EventReview)
+def review_deleted(sender, instance, **kwargs):
+    # Covers instance and queryset deletes as well as cascades; creates and edits go through EventReview.save().
+    Event.apply_rating_change(instance.event_id, removed=instance.rating)
+    Event.bump_version([instance.event_id])
+
+
+@receiver(post_save, sender=EventReview)
+def review_saved(sender, instance, **kwargs):
+    Event.bump_version([instance.event_id])
+
+
+@receiver(post_save, sender=EventMedia)
+@receiver(post_delete, sender=EventMedia)
+def media_changed(sender, instance, **kwargs):
+    Event.bump_version([instance.event_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reference_data_changed(sender, **kwargs):
+    # Every worker drops its local copies within TwoTierCache.version_check_interval.
+    transaction.on_commit(reference_data.invalidate)
+    # The async views cache the same list under their own key.
+    transaction.on_commit(lambda: async_cache.delete(REFERENCE_LIST_KEYS[sender]))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    # Events embed their category's name.
+    if not created:
+        Event.bump_version(Event.objects.filter(category=instance).values('pk'))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        Event.bump_version(Event.tags.through.objects.filter(tag=instance).values('event_id'))
+
+
+def user_event_pairs(instance, pk_set):
+    """
+    (user_id, event_id) pairs for an m2m_changed signal on likes or attendees, sent from either side.
+    """
+    if isinstance(instance, Event):
+        return [(user_id, instance.pk) for user_id in pk_set]
+    return [(instance.pk, event_id) for event_id in pk_set]
+
+
+def changed_pks(instance, action, pk_set, event_accessor, reverse_accessor):
+    """
+    The related pks an m2m_changed signal is about. post_clear has no pk_set, so on pre_clear the rows
+    about to go are remembered on the instance.
+    """
+    if action == 'pre_clear':
+        related = getattr(instance, event_accessor if isinstance(instance, Event) else reverse_accessor)
+        instance._cleared_pks = set(related.values_list('pk', flat=True))
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_pks', set())
+    return pk_set
+
+
+@receiver(m2m_changed, sender=Event.likes.through)
+def likes_changed(sender, instance, action, pk_set, **kwargs):
+    pk_set = changed_pks(instance, action, pk_set, 'likes', 'liked_events')
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        event_ids = event_ids_from_m2m(instance, pk_set)
+        Event.bump_version(event_ids)
+        notify_live(event_ids, 'like')
+        membership.schedule_update('liked', user_event_pairs(instance, pk_set), action == 'post_add')
+
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def attendees_changed(sender, instance, action, pk_set, **kwargs):
+    pk_set = changed_pks(instance, action, pk_set, 'attendees', 'attendees')
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        event_ids = event_ids_from_m2m(instance, pk_set)
+        Event.bump_version(event_ids)
+        notify_live(event_ids, 'rsvp')
+        membership.schedule_update('attending', user_event_pairs(instance, pk_set), action == 'post_add')
+
+
+@receiver(m2m_changed, sender=Event.tags.through)
+def tags_changed(sender, instance, action, pk_set, **kwargs):
+    pk_set = changed_pks(instance, action, pk_set, 'tags', 'event_set')
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Event.bump_version(event_ids_from_m2m(instance, pk_set))
+        if isinstance(instance, Event):
+            pairs = [(tag_id, instance.pk) for tag_id in pk_set]
+        else:
+            pairs = [(instance.pk, event_id) for event_id in pk_set]
+        tag_index.run_after_commit(tag_index.update, pairs, action == 'post_add')
+        autocomplete.schedule_sync('tag', {tag_id for tag_id, _ in pairs})
+
+
+# Autocomplete and tag indexes (event/autocomplete.py, event/tag_index.py). Likes are re-scored by
+# LikeEventView after its counter update.
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_indexed(sender, instance, created=False, **kwargs):
+    autocomplete.schedule_sync('tag', [instance.pk])
+    if not created:
+        # Renamed or deleted: its events move to another posting list (event/tag_index.py).
+        tag_index.run_after_commit(tag_index.sync_tag, instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_indexed(sender, instance, **kwargs):
+    autocomplete.schedule_sync('category', [instance.pk])
+
+
+@receiver(post_save, sender=Event)
+def event_saved_indexed(sender, instance, created, **kwargs):
+    autocomplete.schedule_sync('event', [instance.pk])
+    if created:
+        autocomplete.schedule_sync('category', [instance.category_id])
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted_indexed(sender, instance, **kwargs):
+    autocomplete.schedule_sync('event', [instance.pk])
+    autocomplete.schedule_sync('category', [instance.category_id])
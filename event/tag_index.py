@@ -0,0 +1,242 @@
+"""
+Per-tag posting lists for multi-tag filtering.
+
+Redis keeps one set of event ids per tag name, ``tagindex:tag:<name>``. Sets of integers are stored by
+Redis as sorted integer arrays (intsets) while small, and the AND / OR / NOT of several tags is
+computed inside Redis with SUNIONSTORE / SINTERSTORE / SDIFFSTORE, so a filter over any number of
+tags costs two round trips and never joins the m2m table. The matching ids are then handed to the
+event query as ``id__in``.
+
+The filter parameters, all comma-separated tag names:
+    tags=a,b         events with at least one of the tags (OR)
+    tags_all=a,b     events with every one of the tags (AND)
+    tags_none=a,b    events with none of the tags (NOT)
+
+When Redis is unavailable, or the match is larger than MAX_ID_LIST (a long id list costs more to ship
+and bind than the SQL it replaces), the same expression is applied as m2m subqueries instead.
+
+Posting lists are updated after commit when tags are added to or removed from events and when a tag
+is renamed or deleted (event/signals.py). ``manage.py build_tag_index`` and a nightly beat job rebuild
+them from the database.
+"""
+import logging
+import uuid
+
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Event, Tag
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'tagindex'
+MAX_ID_LIST = 10000
+# Seconds a scratch result key may outlive a request that died between the two round trips.
+SCRATCH_TIMEOUT = 30
+REBUILD_BATCH_SIZE = 5000
+
+
+def posting_key(name):
+    return f'{KEY_PREFIX}:tag:{name}'
+
+
+def built_key():
+    # Set by rebuild(); until then every posting list would look empty, so filtering uses SQL.
+    return f'{KEY_PREFIX}:built'
+
+
+def names_key():
+    # tag id -> name, so a rename or delete knows which posting list the tag's events are in.
+    return f'{KEY_PREFIX}:names'
+
+
+def split_names(value):
+    return [name for name in (value or '').split(',') if name]
+
+
+def tag_params(params):
+    """
+    (any, all, none) tag names from the list query parameters.
+    """
+    return split_names(params.get('tags')), split_names(params.get('tags_all')), split_names(params.get('tags_none'))
+
+
+def matching_ids(any_names, all_names, none_names):
+    """
+    Event ids for the expression, evaluated in Redis. Returns (ids, exclude): when only ``none_names``
+    is given there is no positive set, so the ids to exclude are returned with ``exclude=True``.
+    Returns None if the result is too large to pass as a list or the index hasn't been built yet.
+    """
+    client = get_redis_connection('default')
+    scratch = f'{KEY_PREFIX}:scratch:{uuid.uuid4().hex}'
+    pipe = client.pipeline(transaction=True)
+    pipe.exists(built_key())
+    if any_names or all_names:
+        if any_names:
+            pipe.sunionstore(scratch, [posting_key(name) for name in any_names])
+        if all_names:
+            pipe.sinterstore(scratch, ([scratch] if any_names else []) + [posting_key(name) for name in all_names])
+        if none_names:
+            pipe.sdiffstore(scratch, [scratch] + [posting_key(name) for name in none_names])
+        exclude = False
+    else:
+        pipe.sunionstore(scratch, [posting_key(name) for name in none_names])
+        exclude = True
+    pipe.expire(scratch, SCRATCH_TIMEOUT)
+    pipe.scard(scratch)
+    results = pipe.execute()
+    built, size = results[0], results[-1]
+    if not built or size > MAX_ID_LIST:
+        client.delete(scratch)
+        return None
+    pipe = client.pipeline(transaction=False)
+    pipe.smembers(scratch)
+    pipe.delete(scratch)
+    members, _ = pipe.execute()
+    return [int(member) for member in members], exclude
+
+
+def filter_sql(queryset, any_names, all_names, none_names):
+    links = Event.tags.through.objects
+    if any_names:
+        queryset = queryset.filter(id__in=links.filter(tag__name__in=any_names).values('event_id'))
+    for name in all_names:
+        queryset = queryset.filter(id__in=links.filter(tag__name=name).values('event_id'))
+    if none_names:
+        queryset = queryset.exclude(id__in=links.filter(tag__name__in=none_names).values('event_id'))
+    return queryset
+
+
+def filter_by_tags(queryset, params):
+    """
+    Apply the tags / tags_all / tags_none parameters to an event queryset. Each event appears once.
+    """
+    any_names, all_names, none_names = tag_params(params)
+    if not (any_names or all_names or none_names):
+        return queryset
+    try:
+        result = matching_ids(any_names, all_names, none_names)
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning("tag index unavailable, filtering tags in SQL", extra={'error': str(exc)})
+        result = None
+    if result is None:
+        return filter_sql(queryset, any_names, all_names, none_names)
+    ids, exclude = result
+    return queryset.exclude(id__in=ids) if exclude else queryset.filter(id__in=ids)
+
+
+def update(pairs, add):
+    """
+    Add (or remove) ``(tag_id, event_id)`` pairs to the posting lists.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    client = get_redis_connection('default')
+    tag_ids = sorted({tag_id for tag_id, _ in pairs})
+    names = dict(Tag.objects.filter(pk__in=tag_ids).values_list('pk', 'name'))
+    pipe = client.pipeline(transaction=False)
+    for tag_id, event_id in pairs:
+        name = names.get(tag_id)
+        if name is None:
+            continue
+        if add:
+            pipe.sadd(posting_key(name), event_id)
+        else:
+            pipe.srem(posting_key(name), event_id)
+    for tag_id, name in names.items():
+        pipe.hset(names_key(), tag_id, name)
+    pipe.execute()
+
+
+def sync_tag(tag_id):
+    """
+    Rebuild the posting lists a tag contributes to, after it was renamed or deleted.
+    """
+    client = get_redis_connection('default')
+    old_name = client.hget(names_key(), tag_id)
+    tag = Tag.objects.filter(pk=tag_id).first()
+    names = {old_name.decode()} if old_name is not None else set()
+    if tag is not None:
+        names.add(tag.name)
+        client.hset(names_key(), tag_id, tag.name)
+    else:
+        client.hdel(names_key(), tag_id)
+    for name in names:
+        store(client, name, posting_ids(Event.tags.through.objects.filter(tag__name=name)))
+
+
+def posting_ids(links):
+    ids = links.filter(event__is_deleted=False).values_list('event_id', flat=True).distinct()
+    return ids.iterator(chunk_size=REBUILD_BATCH_SIZE)
+
+
+def store(client, name, event_ids):
+    """
+    Replace one posting list atomically.
+    """
+    pipe = client.pipeline(transaction=True)
+    pipe.delete(posting_key(name))
+    batch = []
+    for event_id in event_ids:
+        batch.append(event_id)
+        if len(batch) == REBUILD_BATCH_SIZE:
+            pipe.sadd(posting_key(name), *batch)
+            batch = []
+    if batch:
+        pipe.sadd(posting_key(name), *batch)
+    pipe.execute()
+
+
+def run_after_commit(function, *args):
+    """
+    Call ``function(*args)`` once the current transaction commits. Never raises: the nightly rebuild
+    repairs the index after a Redis outage, and filtering falls back to SQL meanwhile.
+    """
+    def run():
+        try:
+            function(*args)
+        except RedisError:
+            logger.warning("tag index update failed", extra={'function': function.__name__})
+
+    transaction.on_commit(run)
+
+
+def rebuild():
+    """
+    Rebuild every posting list from the m2m table and drop lists of names no tag has any more.
+    Returns the number of posting lists written.
+    """
+    client = get_redis_connection('default')
+    rows = (
+        Event.tags.through.objects.filter(event__is_deleted=False)
+        .values_list('tag__name', 'event_id').order_by('tag__name', 'event_id').distinct()
+        .iterator(chunk_size=REBUILD_BATCH_SIZE)
+    )
+    written = set()
+    current, ids = None, []
+    for name, event_id in rows:
+        if name != current:
+            if current is not None:
+                store(client, current, ids)
+                written.add(current)
+            current, ids = name, []
+        ids.append(event_id)
+    if current is not None:
+        store(client, current, ids)
+        written.add(current)
+
+    names = dict(Tag.objects.values_list('pk', 'name'))
+    pipe = client.pipeline(transaction=False)
+    if names:
+        pipe.hset(names_key(), mapping=names)
+    gone = [pk for pk in client.hkeys(names_key()) if int(pk) not in names]
+    if gone:
+        pipe.hdel(names_key(), *gone)
+    for key in client.scan_iter(match=posting_key('*'), count=1000):
+        if key.decode()[len(posting_key('')):] not in written:
+            pipe.delete(key)
+    pipe.set(built_key(), 1)
+    pipe.execute()
+    return len(written)
@@ -0,0 +1,180 @@
+"""
+Scheduled lifecycle jobs (see CELERY_BEAT_SCHEDULE).
+
+Everything here works on whole sets of events with single UPDATE / INSERT statements, so the cost
+doesn't grow with a per-row save() and a re-run (or an overlapping run) changes nothing twice.
+"""
+import datetime
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.models import OutboxMessage
+from . import autocomplete, tag_index
+from .media_tasks import delete_stored_files
+from .models import Event, EventComment, EventMedia, EventReview, LikeEvent
+
+# Rows removed per DELETE while purging an event; each batch is its own short transaction.
+PURGE_BATCH_SIZE = 1000
+# Deleted events still present this long after deletion get their purge queued again.
+PURGE_RETRY_AFTER = datetime.timedelta(minutes=30)
+
+logger = logging.getLogger(__name__)
+
+
+def transition(queryset, status):
+    """
+    Move every event in ``queryset`` to ``status`` in one UPDATE. Queryset updates skip save() and the
+    signals, so the version bump that conditional GETs rely on is applied here as well.
+    """
+    return queryset.update(status=status, version=F('version') + 1, updated_at=timezone.now())
+
+
+@shared_task
+def advance_event_statuses():
+    """
+    scheduled -> ongoing once an event has started, scheduled/ongoing -> completed once it has ended.
+    Both filters lead with (status, start_date), matching event_status_start_idx.
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        completed = transition(
+            Event.objects.filter(status__in=['scheduled', 'ongoing'], start_date__lte=today, end_date__lt=today),
+            'completed',
+        )
+        started = transition(
+            Event.objects.filter(status='scheduled', start_date__lte=today, end_date__gte=today),
+            'ongoing',
+        )
+    logger.info("advanced event statuses", extra={'ongoing': started, 'completed': completed})
+    return {'ongoing': started, 'completed': completed}
+
+
+@shared_task
+def queue_event_reminders(day=None):
+    """
+    Queue a "starting tomorrow" reminder for every scheduled event starting on ``day`` (ISO date,
+    default tomorrow). The day is one bucket, read and written in one pass; each reminder's idempotency
+    key names its event and day, so running the bucket again adds nothing.
+    """
+    day = datetime.date.fromisoformat(day) if day else timezone.localdate() + datetime.timedelta(days=1)
+    event_ids = Event.objects.filter(status='scheduled', start_date=day).values_list('id', flat=True)
+    OutboxMessage.enqueue_many(OutboxMessage.EVENT_REMINDER, [
+        (f"event_reminder:{event_id}:{day.isoformat()}", {'event_id': event_id}) for event_id in event_ids
+    ])
+    logger.info("queued event reminders", extra={'day': day.isoformat(), 'events': len(event_ids)})
+    return len(event_ids)
+
+
+def purge_progress_key(event_id):
+    return f"event:{event_id}:purge"
+
+
+def purge_progress(event_id):
+    return cache.get(purge_progress_key(event_id))
+
+
+def delete_in_batches(queryset, on_batch=None):
+    """
+    Delete ``queryset`` PURGE_BATCH_SIZE rows at a time, in its ordering, yielding the running total
+    after each batch. ``on_batch(ids)`` runs first inside the batch's transaction.
+
+    Rows go through a raw DELETE: the per-row signals (counter updates, cache invalidation, live
+    updates) only matter for an event that still exists.
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:PURGE_BATCH_SIZE])
+        if not ids:
+            return
+        with transaction.atomic():
+            if on_batch is not None:
+                on_batch(ids)
+            model._base_manager.filter(pk__in=ids)._raw_delete(model._base_manager.db)
+        total += len(ids)
+        yield total
+
+
+def delete_files_on_commit(files):
+    """
+    Queue the stored ``files`` for deletion on the `media` queue once the current transaction commits,
+    so rows that survive a rollback never point to missing files.
+    """
+    names = [file.name for file in files if file]
+    if names:
+        transaction.on_commit(lambda: delete_stored_files.delay(names))
+
+
+def delete_media_files(ids):
+    delete_files_on_commit(media.file for media in EventMedia.objects.filter(pk__in=ids).only('id', 'file'))
+
+
+@shared_task
+def purge_event(event_id):
+    """
+    Remove a soft-deleted event's dependent rows in bounded batches, then its files and the event row.
+    Progress is kept in the cache under purge_progress_key(); safe to re-run after a crash.
+    """
+    event = Event.all_objects.filter(pk=event_id, is_deleted=True).first()
+    if event is None:
+        return
+    steps = [
+        ('attendees', Event.attendees.through.objects.filter(event_id=event_id).order_by('pk'), None),
+        ('likes', Event.likes.through.objects.filter(event_id=event_id).order_by('pk'), None),
+        ('like_events', LikeEvent.objects.filter(event_id=event_id).order_by('pk'), None),
+        ('tags', Event.tags.through.objects.filter(event_id=event_id).order_by('pk'), None),
+        # Deepest replies first, so no batch removes a comment whose replies still exist.
+        ('comments', EventComment.objects.filter(event_id=event_id).order_by('-depth', 'pk'), None),
+        ('reviews', EventReview.objects.filter(event_id=event_id).order_by('pk'), None),
+        ('media', EventMedia.objects.filter(event_id=event_id).order_by('pk'), delete_media_files),
+    ]
+    progress = {'event_id': event_id, 'status': 'running', 'deleted': {}}
+    for name, queryset, on_batch in steps:
+        progress['deleted'][name] = 0
+        for deleted in delete_in_batches(queryset, on_batch):
+            progress['deleted'][name] = deleted
+            cache.set(purge_progress_key(event_id), progress, timeout=24 * 3600)
+
+    with transaction.atomic():
+        delete_files_on_commit([event.image])
+        event.delete()
+    progress['status'] = 'done'
+    cache.set(purge_progress_key(event_id), progress, timeout=24 * 3600)
+    logger.info("purged event", extra=progress)
+
+
+@shared_task
+def requeue_stalled_purges():
+    """
+    Queue purge_event again for deleted events that are still around (e.g. the worker died mid-purge).
+    """
+    cutoff = timezone.now() - PURGE_RETRY_AFTER
+    event_ids = list(Event.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff).values_list('pk', flat=True))
+    for event_id in event_ids:
+        purge_event.delay(event_id)
+    return len(event_ids)
+
+
+@shared_task
+def rebuild_autocomplete_index():
+    """
+    Resync the autocomplete index with the database, fixing scores that set-based updates left behind.
+    """
+    counts = autocomplete.rebuild()
+    logger.info("rebuilt autocomplete index", extra=counts)
+    return counts
+
+
+@shared_task
+def rebuild_tag_index():
+    """
+    Rebuild the tag posting lists from the m2m table (see event/tag_index.py).
+    """
+    written = tag_index.rebuild()
+    logger.info("rebuilt tag index", extra={'tags': written})
+    return written
@@ -1,3 +1,887 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.models import OutboxMessage
+from TBC_final_project import caching, celery_app
+from TBC_final_project.testing import RedisTestCase
+from . import autocomplete, batch, media_tasks, membership, realtime, tag_index, tasks
+from .models import Category, Event, EventComment, EventMedia, EventReview, Tag
+
+
+def bearer(user):
+    return {'Authorization': f"Bearer {AccessToken.for_user(user)}"}
+
+
+class AsyncReadTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.events = [self.create_event(f"Event {number}", self.user) for number in range(12)]
+        self.client = AsyncClient()
+
+    def commit(self, function):
+        with self.captureOnCommitCallbacks(execute=True):
+            function()
+
+    async def test_list_is_paginated_and_flagged_for_the_user(self):
+        liked = self.events[3]
+        await sync_to_async(self.commit)(lambda: liked.likes.add(self.user))
+
+        response = await self.client.get(reverse('async-event-list'), headers=bearer(self.user))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['count'], 12)
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNotNone(data['next'])
+        self.assertEqual([row['id'] for row in data['results'] if row['is_liked']], [liked.pk])
+        self.assertNotIn('attendees', data['results'][0])
+
+    async def test_retrieve_and_stats(self):
+        event = self.events[0]
+        await sync_to_async(self.commit)(lambda: event.attendees.add(self.user))
+
+        response = await self.client.get(reverse('async-event-retrieve', kwargs={'id': event.pk}))
+        self.assertEqual(response.json()['title'], event.title)
+        response = await self.client.get(reverse('async-event-stats', kwargs={'event_id': event.pk}))
+        self.assertEqual(response.json(), {
+            'event_id': event.pk, 'event_title': event.title, 'rsvp_count': 1, 'like_count': 0,
+        })
+        response = await self.client.get(reverse('async-event-retrieve', kwargs={'id': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_drf_checks_apply(self):
+        response = await self.client.post(reverse('async-event-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.client.get(reverse('async-event-list'), headers={'Authorization': "Bearer invalid"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_reference_lists_follow_edits(self):
+        category = await Category.objects.aget(name="Music")
+        response = await self.client.get(reverse('async-category-list'))
+        self.assertEqual([row['name'] for row in response.json()], ["Music"])
+
+        def rename():
+            category.name = "Jazz"
+            category.save()
+            Tag.objects.create(name="live")
+        await sync_to_async(self.commit)(rename)
+
+        response = await self.client.get(reverse('async-category-list'))
+        self.assertEqual([row['name'] for row in response.json()], ["Jazz"])
+        response = await self.client.get(reverse('async-tag-list'))
+        self.assertEqual([row['name'] for row in response.json()], ["live"])
+
+
+class BatchActionsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.other = self.create_user('bob')
+        self.event = self.create_event("Jazz Night", self.other)
+        self.second = self.create_event("Rock Night", self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, *operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('batch-actions'),
+                {'operations': [{'op': op, 'id': pk} for op, pk in operations]},
+                format='json',
+            )
+
+    def statuses(self, response):
+        return [result['status'] for result in response.data['results']]
+
+    def test_operations_see_the_state_left_by_earlier_ones(self):
+        pk = self.event.pk
+        response = self.post(('like', pk), ('like', pk), ('unlike', pk), ('unlike', pk), ('like', pk))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.statuses(response), [201, 200, 200, 400, 201])
+        self.assertEqual(response.data['results'][3]['error'], "You have not liked this event.")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.likes_number, 1)
+        self.assertTrue(self.event.likes.filter(pk=self.user.pk).exists())
+
+    def test_only_the_net_change_is_written(self):
+        self.post(('like', self.second.pk))
+        version = Event.objects.get(pk=self.event.pk).version
+
+        response = self.post(
+            ('unlike', self.second.pk), ('like', self.second.pk),
+            ('like', self.event.pk), ('unlike', self.event.pk),
+        )
+
+        self.assertEqual(self.statuses(response), [200, 201, 201, 200])
+        self.event.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.event.likes_number, 0)
+        self.assertEqual(self.second.likes_number, 1)
+        self.assertEqual(self.event.version, version)
+        self.assertEqual(list(self.user.liked_events.values_list('pk', flat=True)), [self.second.pk])
+
+    def test_failed_operations_do_not_stop_the_rest(self):
+        canceled = self.create_event("Canceled", self.other, status='canceled')
+        response = self.post(
+            ('like', 999999), ('rsvp', canceled.pk), ('follow', self.user.pk),
+            ('unrsvp', self.event.pk), ('follow', self.other.pk), ('rsvp', self.event.pk),
+        )
+
+        self.assertEqual(self.statuses(response), [404, 400, 400, 400, 200, 201])
+        self.assertEqual(response.data['results'][2]['error'], "You cannot follow yourself.")
+        self.assertTrue(self.other.followers.filter(pk=self.user.pk).exists())
+        self.assertTrue(self.event.attendees.filter(pk=self.user.pk).exists())
+        self.assertFalse(canceled.attendees.exists())
+
+    def test_membership_sets_follow_the_net_change(self):
+        self.post(('like', self.event.pk), ('rsvp', self.second.pk), ('like', self.second.pk),
+                  ('unlike', self.second.pk))
+
+        found = membership.flags(self.user.pk, [self.event.pk, self.second.pk])
+        self.assertEqual(found, {'liked': {self.event.pk}, 'attending': {self.second.pk}})
+
+    def test_query_count_does_not_grow_with_the_operations(self):
+        events = [self.create_event(f"Event {number}", self.other) for number in range(20)]
+
+        with CaptureQueriesContext(connection) as few:
+            self.post(*[('like', event.pk) for event in events[:2]])
+        with CaptureQueriesContext(connection) as many:
+            self.post(*[('like', event.pk) for event in events[2:]])
+
+        self.assertEqual(len(many), len(few))
+
+    def test_invalid_lists_are_rejected(self):
+        url = reverse('batch-actions')
+        too_many = [{'op': 'like', 'id': self.event.pk}] * (batch.MAX_OPERATIONS + 1)
+        for operations in ([], [{'op': 'share', 'id': self.event.pk}], too_many):
+            response = self.client.post(url, {'operations': operations}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.event.likes.exists())
+
+    def test_requires_authentication(self):
+        response = APIClient().post(reverse('batch-actions'), {'operations': [{'op': 'like', 'id': self.event.pk}]},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TagFilterTests(RedisTestCase):
+    EXPRESSIONS = [
+        {'tags': 'jazz'},
+        {'tags': 'jazz,free'},
+        {'tags_all': 'jazz,rock'},
+        {'tags_none': 'rock'},
+        {'tags': 'jazz,free', 'tags_none': 'rock'},
+        {'tags': 'free', 'tags_all': 'rock'},
+        {'tags_all': 'jazz', 'tags_none': 'free,rock'},
+        {'tags': 'missing'},
+        {'tags_none': 'missing'},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        organizer = self.create_user('organizer')
+        jazz, rock, free = (Tag.objects.create(name=name) for name in ('jazz', 'rock', 'free'))
+        self.jazz = jazz
+        self.events = {}
+        for title, tags in (('a', [jazz]), ('b', [jazz, rock]), ('c', [rock, free]), ('d', [free]), ('e', [])):
+            self.events[title] = self.create_event(title, organizer)
+            self.events[title].tags.set(tags)
+
+    def ids(self, queryset):
+        return set(queryset.values_list('id', flat=True))
+
+    def assert_parity(self):
+        for params in self.EXPRESSIONS:
+            with self.subTest(params=params):
+                expected = self.ids(tag_index.filter_sql(Event.objects.all(), *tag_index.tag_params(params)))
+                self.assertEqual(self.ids(tag_index.filter_by_tags(Event.objects.all(), params)), expected)
+
+    def test_index_matches_sql(self):
+        tag_index.rebuild()
+        self.assertIsNotNone(tag_index.matching_ids(['jazz'], [], []))
+        self.assert_parity()
+        self.assertEqual(
+            self.ids(tag_index.filter_by_tags(Event.objects.all(), {'tags': 'jazz,free', 'tags_none': 'rock'})),
+            {self.events['a'].pk, self.events['d'].pk},
+        )
+
+    def test_unbuilt_index_falls_back_to_sql(self):
+        self.assertIsNone(tag_index.matching_ids(['jazz'], [], []))
+        self.assert_parity()
+
+    def test_index_follows_tag_changes(self):
+        tag_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.events['e'].tags.add(self.jazz)
+            self.events['b'].tags.remove(self.jazz)
+        self.assert_parity()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jazz.name = 'blues'
+            self.jazz.save()
+        self.assertEqual(self.ids(tag_index.filter_by_tags(Event.objects.all(), {'tags': 'jazz'})), set())
+        self.assertEqual(self.ids(tag_index.filter_by_tags(Event.objects.all(), {'tags': 'blues'})),
+                         {self.events['a'].pk, self.events['e'].pk})
+
+
+class MembershipTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.liked = self.create_event("Liked", self.user)
+        self.attending = self.create_event("Attending", self.user)
+        self.other = self.create_event("Other", self.user)
+        self.rows = [{'id': event.pk} for event in (self.liked, self.attending, self.other)]
+
+    def flags(self, rows):
+        return [(row['id'], row['is_liked'], row['is_attending']) for row in rows]
+
+    def test_annotate_sets_the_users_flags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.liked.likes.add(self.user)
+            self.attending.attendees.add(self.user)
+
+        rows = membership.annotate(self.rows, self.user)
+
+        self.assertEqual(self.flags(rows), [
+            (self.liked.pk, True, False), (self.attending.pk, False, True), (self.other.pk, False, False),
+        ])
+        self.assertNotIn('is_liked', self.rows[0])
+
+    def test_anonymous_users_get_no_flags(self):
+        self.liked.likes.add(self.user)
+        rows = membership.annotate(self.rows, None)
+        self.assertFalse(any(row['is_liked'] or row['is_attending'] for row in rows))
+
+    def test_sets_are_loaded_from_the_database(self):
+        # Without the after-commit update the set is only right if it is loaded from the rows.
+        self.liked.likes.add(self.user)
+        self.assertEqual(membership.Members('liked', self.user.pk)[0:10], [self.liked.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.liked.likes.remove(self.user)
+            self.other.likes.add(self.user)
+        rows = membership.annotate(self.rows, self.user)
+        self.assertEqual([row['is_liked'] for row in rows], [False, False, True])
+
+    def test_changes_bump_the_version(self):
+        before = membership.version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.liked.likes.add(self.user)
+        self.assertGreater(membership.version(self.user.pk), before)
+
+
+class MembershipEventsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.events = [self.create_event(f"Event {n}", self.user) for n in range(5)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for event in self.events:
+                event.likes.add(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('my-liked-events')
+
+    def test_pages_are_newest_first_without_attendees(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 2})
+
+        self.assertEqual(response.data['count'], 5)
+        newest_first = sorted((event.pk for event in self.events), reverse=True)
+        self.assertEqual([row['id'] for row in response.data['results']], newest_first[2:4])
+        self.assertTrue(all(row['is_liked'] for row in response.data['results']))
+        self.assertNotIn('attendees', response.data['results'][0])
+
+    def test_only_the_page_is_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'page_size': 2})
+        event_queries = [query['sql'] for query in queries if 'FROM "event_event"' in query['sql']]
+        self.assertEqual(len(event_queries), 1)
+        self.assertIn(f"IN ({self.events[4].pk}, {self.events[3].pk})", event_queries[0])
+
+    def test_deleted_events_are_left_out(self):
+        # Soft-deleted events keep their likes until the purge task runs.
+        Event.all_objects.filter(pk=self.events[4].pk).update(is_deleted=True)
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.events[3].pk])
+
+    def test_falls_back_to_the_database_when_redis_is_down(self):
+        with mock.patch('event.membership.get_redis_connection', side_effect=RedisConnectionError("down")):
+            with self.assertLogs('event.membership', 'WARNING'):
+                response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.events[4].pk, self.events[3].pk])
+
+
+class ConditionalGetTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.event = self.create_event("Jazz Night", self.user)
+        self.client = APIClient()
+
+    def get(self, url, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(url, **headers)
+
+    def expire_list_entries(self):
+        for key in cache.keys('events:list:*'):
+            cache.set(key, {**cache.get(key), 'fresh_until': 0})
+
+    def test_retrieve_answers_a_matching_etag_with_304(self):
+        url = reverse('event-retrieve', kwargs={'id': self.event.pk})
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title = "Jazz Night II"
+            self.event.save()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['title'], "Jazz Night II")
+
+    def test_retrieve_etag_changes_with_likes(self):
+        url = reverse('event-retrieve', kwargs={'id': self.event.pk})
+        etag = self.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.likes.add(self.user)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_list_answers_a_matching_etag_with_304(self):
+        url = reverse('event-list')
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_event("Rock Night", self.user)
+        # Until the entry is rebuilt the cached list, and with it the ETag, stays as it was.
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.expire_list_entries()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 2)
+
+    def test_stale_list_is_served_with_its_own_etag(self):
+        url = reverse('event-list')
+        etag = self.get(url)['ETag']
+        self.create_event("Rock Night", self.user)
+        self.expire_list_entries()
+        cache_key = cache.keys('events:list:*')[0]
+        cache.add(caching.lock_key(cache_key), "another request")
+
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # Another request holds the rebuild lock: the stale body is still current for its own ETag.
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(self.get(url).data), 1)
+
+    def test_list_etag_covers_the_users_flags(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('event-list')
+        response = self.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.data[0]['is_liked'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('like-event', kwargs={'event_id': self.event.pk}))
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data[0]['is_liked'])
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+
+class AutocompleteTests(RedisTestCase):
+    def test_prefixes_do_not_collide_with_the_names_map(self):
+        # "names" is also the suffix of the id -> name map's key; both must survive a rebuild.
+        organizer = self.create_user('organizer')
+        tag = Tag.objects.create(name="Names")
+        event = self.create_event("Namesake", organizer)
+        autocomplete.rebuild()
+
+        results = autocomplete.search("names")
+
+        self.assertEqual(results['tag'], [{'id': tag.pk, 'name': "Names"}])
+        self.assertEqual(results['event'], [{'id': event.pk, 'name': "Namesake"}])
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = "Labels"
+            tag.save()
+        self.assertEqual(autocomplete.search("names")['tag'], [])
+        self.assertEqual(autocomplete.search("lab")['tag'], [{'id': tag.pk, 'name': "Labels"}])
+
+
+class SeedDataTests(RedisTestCase):
+    def seed(self, **options):
+        options = {
+            'users': 20, 'follows': 40, 'categories': 3, 'tags': 5, 'events': 15, 'likes': 60, 'rsvps': 40,
+            'comments': 30, 'replies': 20, 'reviews': 40, 'batch_size': 7, 'stdout': StringIO(), **options,
+        }
+        call_command('seed_data', **options)
+
+    def test_counters_and_paths_match_the_generated_rows(self):
+        self.seed()
+
+        self.assertEqual(Event.objects.count(), 15)
+        for event in Event.objects.annotate(likes_total=Count('likes', distinct=True)):
+            self.assertEqual(event.likes_number, event.likes_total)
+            ratings = list(event.reviews.values_list('rating', flat=True))
+            self.assertEqual((event.rating_count, event.rating_sum), (len(ratings), sum(ratings)))
+            self.assertEqual(event.rating_5, ratings.count(5))
+        for comment in EventComment.objects.select_related('parent'):
+            parent_path = comment.parent.path if comment.parent else ''
+            self.assertEqual(comment.path, parent_path + EventComment.path_segment(comment.pk))
+            self.assertEqual(comment.reply_count, comment.replies.count())
+
+    def test_runs_add_to_the_dataset_and_rebuild_the_indexes(self):
+        self.seed()
+        self.seed()
+
+        self.assertEqual(Event.objects.count(), 30)
+        tag = Tag.objects.filter(event__isnull=False).order_by('pk').first()
+        ids, exclude = tag_index.matching_ids([tag.name], [], [])
+        self.assertFalse(exclude)
+        self.assertEqual(sorted(ids), sorted(tag.event_set.values_list('pk', flat=True)))
+
+
+class CommentThreadTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.event = self.create_event("Jazz Night", self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('event-comments', args=[self.event.pk])
+
+    def post(self, content, parent=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'content': content, 'parent': parent}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['comment']['id']
+
+    def test_thread_is_returned_depth_first(self):
+        root = self.post("root")
+        first = self.post("first", parent=root)
+        self.post("other root")
+        second = self.post("second", parent=root)
+        nested = self.post("nested", parent=first)
+
+        response = self.client.get(reverse('event-comment-thread', args=[self.event.pk, root]))
+
+        self.assertEqual([comment['id'] for comment in response.data], [root, first, nested, second])
+        self.assertEqual([comment['depth'] for comment in response.data], [0, 1, 2, 1])
+        self.assertEqual(response.data[0]['reply_count'], 2)
+
+    def test_deleting_a_reply_updates_the_parent(self):
+        root = self.post("root")
+        reply = self.post("reply", parent=root)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('delete-event-comment', args=[self.event.pk, reply]))
+        self.assertEqual(EventComment.objects.get(pk=root).reply_count, 0)
+
+    def test_list_pages_top_level_comments_by_cursor(self):
+        roots = [self.post(f"comment {number}") for number in range(3)]
+        self.post("reply", parent=roots[0])
+
+        first = self.client.get(self.url, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([comment['id'] for comment in first.data['results']], roots[:0:-1])
+        self.assertEqual([comment['id'] for comment in second.data['results']], roots[:1])
+        self.assertIsNone(second.data['next'])
+
+    def test_cached_first_page_follows_new_replies(self):
+        root = self.post("root")
+        self.assertEqual(self.client.get(self.url).data['results'][0]['reply_count'], 0)
+
+        self.post("reply", parent=root)
+
+        self.assertEqual(self.client.get(self.url).data['results'][0]['reply_count'], 1)
+
+    def test_replies_stay_on_the_same_event(self):
+        other = self.create_event("Other", self.user)
+        foreign = EventComment.objects.create(event=other, user=self.user, content="elsewhere")
+
+        response = self.client.post(self.url, {'content': "reply", 'parent': foreign.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.data)
+
+
+class RatingAggregateTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Jazz Night", self.create_user('organizer'))
+        self.url = reverse('submit-event-review', args=[self.event.pk])
+
+    def review(self, name, rating):
+        client = APIClient()
+        client.force_authenticate(self.create_user(name))
+        response = client.post(self.url, {'rating': rating, 'content': "Good"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return client
+
+    def assert_matches_reviews(self):
+        self.event.refresh_from_db()
+        ratings = list(self.event.reviews.values_list('rating', flat=True))
+        self.assertEqual((self.event.rating_count, self.event.rating_sum), (len(ratings), sum(ratings)))
+        self.assertEqual(self.event.rating_histogram, {rating: ratings.count(rating) for rating in range(1, 6)})
+
+    def test_reviews_keep_the_aggregates_current(self):
+        self.review('alice', 5)
+        bob = self.review('bob', 2)
+        self.assert_matches_reviews()
+        self.assertEqual(self.event.average_rating, 3.5)
+
+        bob.patch(self.url, {'rating': 4}, format='json')
+        self.assert_matches_reviews()
+        self.assertEqual(self.event.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+    def test_withdrawn_review_leaves_no_body_and_no_count(self):
+        client = self.review('alice', 5)
+
+        response = client.delete(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(response.data)
+        self.assertEqual(response.content, b'')
+        self.assert_matches_reviews()
+        self.assertIsNone(self.event.average_rating)
+
+    def test_queryset_deletes_are_counted_too(self):
+        self.review('alice', 1)
+        self.review('bob', 3)
+        self.event.reviews.filter(rating=1).delete()
+        self.assert_matches_reviews()
+
+    def test_list_orders_by_the_stored_average(self):
+        unrated = self.create_event("Unrated", self.event.organizer)
+        better = self.create_event("Better", self.event.organizer)
+        self.review('alice', 3)
+        EventReview.objects.create(event=better, user=self.create_user('bob'), rating=5)
+
+        response = self.client.get(reverse('event-list'), {'ordering': '-rating'})
+
+        self.assertEqual([event['id'] for event in response.data][:2], [better.pk, self.event.pk])
+        self.assertEqual(response.data[-1]['id'], unrated.pk)
+
+
+class LiveUpdateTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.event = self.create_event("Jazz Night", self.user)
+
+    def like(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.likes.add(user)
+            Event.objects.filter(pk=self.event.pk).update(likes_number=F('likes_number') + 1)
+
+    async def test_bursts_reach_subscribers_as_one_snapshot(self):
+        broker = realtime.LocalBroker()
+        hub = realtime.EventUpdateHub(broker, interval=60)
+        subscriber = hub.subscribe(self.event.pk)
+        self.addCleanup(hub.task.cancel)
+        await asyncio.sleep(0)  # let the listener register with the broker
+
+        for number in range(3):
+            await sync_to_async(self.like)(await sync_to_async(self.create_user)(f"fan{number}"))
+            broker.publish({'event_id': self.event.pk, 'kind': 'like'})
+        broker.publish({'event_id': self.event.pk + 1, 'kind': 'like'})  # nobody is listening for it
+        await asyncio.sleep(0)
+        self.assertEqual(hub.dirty, {self.event.pk})
+        await hub.flush()
+
+        snapshot = await subscriber.next(timeout=1)
+        self.assertEqual((snapshot['likes_number'], snapshot['rsvp_count']), (3, 0))
+        self.assertIsNone(await subscriber.next(timeout=0.01))
+        self.assertEqual(hub.flushes, 1)
+
+    async def test_subscriber_keeps_only_the_newest_snapshot(self):
+        subscriber = realtime.Subscriber(self.event.pk)
+        subscriber.offer({'likes_number': 1})
+        subscriber.offer({'likes_number': 2})
+        self.assertEqual(await subscriber.next(timeout=1), {'likes_number': 2})
+        self.assertIsNone(await subscriber.next(timeout=0.01))
+
+    def test_writes_publish_after_commit(self):
+        with mock.patch('event.signals.publish_event_change') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.event.likes.add(self.create_user('bob'))
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        publish.assert_called_once_with(self.event.pk, 'like')
+
+    async def test_stream_starts_with_the_current_counters(self):
+        response = await AsyncClient().get(reverse('event-live', args=[self.event.pk]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            first = await anext(stream)
+        finally:
+            await stream.aclose()
+        self.assertTrue(first.decode().startswith("event: stats\n"))
+        self.assertEqual(json.loads(first.decode().split("data: ", 1)[1])['likes_number'], 0)
+
+
+class AttendeeListTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = self.create_user('organizer')
+        self.event = self.create_event("Jazz Night", self.organizer)
+        self.alice = self.create_user('alice')
+        self.event.attendees.add(self.alice, self.create_user('bob'))
+        self.url = reverse('event-attendees', args=[self.event.pk])
+        self.client = APIClient()
+
+    def search(self, term):
+        return [user['username'] for user in self.client.get(self.url, {'search': term}).data['results']]
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_only_the_organizer_searches_by_email(self):
+        self.alice.email = "zed@example.com"
+        self.alice.save()
+        self.client.force_authenticate(self.create_user('carol'))
+        self.assertEqual(self.search("ALI"), ["alice"])
+        self.assertEqual(self.search("zed@"), [])
+
+        self.client.force_authenticate(self.organizer)
+        self.assertEqual(self.search("zed@"), ["alice"])
+
+    def test_unknown_event_is_404(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.get(reverse('event-attendees', args=[self.event.pk + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MediaTaskTests(RedisTestCase):
+    def test_file_deletes_are_queued_on_the_media_queue_after_commit(self):
+        files = [SimpleNamespace(name=name) for name in ("events/a.png", "event_media/b.mp4")]
+        with mock.patch('event.tasks.delete_stored_files') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                tasks.delete_files_on_commit(files + [None])
+                task.delay.assert_not_called()
+        task.delay.assert_called_once_with(["events/a.png", "event_media/b.mp4"])
+
+        route = celery_app.amqp.router.route({}, 'event.media_tasks.delete_stored_files')
+        self.assertEqual(route['queue'].name, 'media')
+
+    def test_only_failed_deletes_are_retried(self):
+        def delete(name):
+            if name == "locked.png":
+                raise PermissionError(name)
+
+        with mock.patch.object(media_tasks.default_storage, 'delete', side_effect=delete), \
+                mock.patch.object(media_tasks.delete_stored_files, 'retry', side_effect=Retry) as retry, \
+                self.assertLogs('event.media_tasks', 'WARNING'):
+            with self.assertRaises(Retry):
+                media_tasks.delete_stored_files(["gone.png", "locked.png"])
+        self.assertEqual(retry.call_args.kwargs['args'], [["locked.png"]])
+
+
+class LifecycleTaskTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = self.create_user('organizer')
+        self.today = datetime.date.today()
+
+    def event(self, title, start, end, status='scheduled'):
+        return self.create_event(title, self.organizer, start_date=self.today + datetime.timedelta(days=start),
+                                 end_date=self.today + datetime.timedelta(days=end), status=status)
+
+    def test_statuses_follow_the_calendar(self):
+        running = self.event("Running", -1, 1)
+        finished = self.event("Finished", -3, -1)
+        ongoing_finished = self.event("Was ongoing", -3, -1, status='ongoing')
+        upcoming = self.event("Upcoming", 1, 2)
+        canceled = self.event("Canceled", -3, -1, status='canceled')
+        version = Event.objects.get(pk=running.pk).version
+
+        with self.assertLogs('event.tasks', 'INFO'):
+            self.assertEqual(tasks.advance_event_statuses(), {'ongoing': 1, 'completed': 2})
+
+        statuses = dict(Event.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[event.pk] for event in (running, finished, ongoing_finished, upcoming, canceled)],
+            ['ongoing', 'completed', 'completed', 'scheduled', 'canceled'],
+        )
+        # The version moves too, so cached ETags for the event stop matching.
+        self.assertGreater(Event.objects.get(pk=running.pk).version, version)
+        with self.assertLogs('event.tasks', 'INFO'):
+            self.assertEqual(tasks.advance_event_statuses(), {'ongoing': 0, 'completed': 0})
+
+    def test_reminders_are_queued_once_per_event_and_day(self):
+        tomorrow = self.event("Tomorrow", 1, 1)
+        self.event("Later", 2, 2)
+        self.event("Canceled", 1, 1, status='canceled')
+
+        with self.assertLogs('event.tasks', 'INFO'):
+            self.assertEqual(tasks.queue_event_reminders(), 1)
+            tasks.queue_event_reminders()
+
+        reminders = OutboxMessage.objects.filter(kind=OutboxMessage.EVENT_REMINDER)
+        self.assertEqual([reminder.payload for reminder in reminders], [{'event_id': tomorrow.pk}])
+
+
+class EventDeleteTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = self.create_user('organizer')
+        self.event = self.create_event("Jazz Night", self.organizer, image="events/jazz.png")
+        self.other = self.create_event("Rock Night", self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def delete(self):
+        with mock.patch('event.views.purge_event') as purge, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('event-delete', args=[self.event.pk]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        purge.delay.assert_called_once_with(self.event.pk)
+
+    async def async_titles(self):
+        response = await AsyncClient().get(reverse('async-event-list'))
+        return [event['title'] for event in response.json()['results']]
+
+    def test_deleted_event_leaves_the_cached_lists_at_once(self):
+        self.assertEqual(len(self.client.get(reverse('event-list')).data), 2)
+        self.assertEqual(async_to_sync(self.async_titles)(), ["Jazz Night", "Rock Night"])
+
+        self.delete()
+
+        self.assertEqual([event['title'] for event in self.client.get(reverse('event-list')).data], ["Rock Night"])
+        self.assertEqual(async_to_sync(self.async_titles)(), ["Rock Night"])
+        self.assertEqual(self.client.get(reverse('event-delete-status', args=[self.event.pk])).data['status'],
+                         'queued')
+
+    @mock.patch.object(tasks, 'PURGE_BATCH_SIZE', 2)
+    def test_purge_removes_the_event_in_batches(self):
+        users = [self.create_user(f"fan{number}") for number in range(5)]
+        self.event.attendees.add(*users)
+        self.other.attendees.add(*users)
+        root = EventComment.objects.create(event=self.event, user=users[0], content="root")
+        EventComment.objects.create(event=self.event, user=users[1], parent=root, content="reply")
+        EventMedia.objects.create(event=self.event, file="event_media/clip.mp4")
+        self.delete()
+
+        with mock.patch('event.tasks.delete_stored_files') as delete_files, \
+                self.captureOnCommitCallbacks(execute=True), self.assertLogs('event.tasks', 'INFO'):
+            tasks.purge_event(self.event.pk)
+
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+        self.assertFalse(EventComment.objects.filter(event_id=self.event.pk).exists())
+        self.assertEqual(self.other.attendees.count(), 5)
+        self.assertEqual([call.args[0] for call in delete_files.delay.call_args_list],
+                         [["event_media/clip.mp4"], ["events/jazz.png"]])
+        progress = tasks.purge_progress(self.event.pk)
+        self.assertEqual((progress['status'], progress['deleted']['attendees'], progress['deleted']['comments']),
+                         ('done', 5, 2))
+        # A second run (e.g. from requeue_stalled_purges) finds nothing left to do.
+        tasks.purge_event(self.event.pk)
+
+
+class EventAdminTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = self.create_user('admin', is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        self.jazz = self.create_event("Jazz Night", admin_user)
+        self.deleted = self.create_event("JAZZ Brunch", admin_user)
+        Event.objects.filter(pk=self.deleted.pk).update(is_deleted=True)
+        self.create_event("Rock Night", admin_user)
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:event_event_changelist'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_title_search_is_an_indexed_prefix_match(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist(q="jazz")
+
+        self.assertEqual({event.pk for event in response.context['cl'].result_list}, {self.jazz.pk, self.deleted.pk})
+        self.assertTrue(any('LOWER("event_event"."title") >=' in query['sql'] for query in queries))
+        self.assertEqual(list(self.changelist(q="night").context['cl'].result_list), [])
+
+    def test_deleted_events_are_listed_in_admin_order(self):
+        result = list(self.changelist(o='-1').context['cl'].result_list)
+        self.assertEqual(len(result), 3)
+        self.assertEqual([event.pk for event in result], sorted((event.pk for event in result), reverse=True))
+
+
+class FacetTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        organizer = self.create_user('organizer')
+        music, film = Category.objects.create(name="Music"), Category.objects.create(name="Film")
+        self.jazz, self.rock = Tag.objects.create(name="jazz"), Tag.objects.create(name="rock")
+        events = [
+            self.create_event("Jazz Night", organizer, category=music, city="Tbilisi"),
+            self.create_event("Rock Night", organizer, category=music, city="Batumi"),
+            self.create_event("Jazz Film", organizer, category=film, city="Tbilisi", status='canceled'),
+        ]
+        events[0].tags.add(self.jazz)
+        events[1].tags.add(self.rock)
+        events[2].tags.add(self.jazz)
+        tag_index.rebuild()
+
+    def facets(self, **params):
+        response = self.client.get(reverse('event-facets'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {dimension: {row.get('name', row.get('value')): row['count'] for row in rows}
+                for dimension, rows in response.data.items()}
+
+    def test_counts_cover_every_dimension(self):
+        self.assertEqual(self.facets(), {
+            'category': {"Music": 2, "Film": 1},
+            'tags': {"jazz": 2, "rock": 1},
+            'city': {"Tbilisi": 2, "Batumi": 1},
+            'status': {'scheduled': 2, 'canceled': 1},
+        })
+
+    def test_a_dimension_ignores_its_own_filter(self):
+        facets = self.facets(category="music")
+        self.assertEqual(facets['category'], {"Music": 2, "Film": 1})
+        self.assertEqual(facets['tags'], {"jazz": 1, "rock": 1})
+        self.assertEqual(facets['status'], {'scheduled': 2})
+
+        facets = self.facets(tags="jazz")
+        self.assertEqual(facets['tags'], {"jazz": 2, "rock": 1})
+        self.assertEqual(facets['city'], {"Tbilisi": 2})
+
+    def test_paging_and_ordering_share_one_entry(self):
+        self.facets(category="music")
+        with self.assertNumQueries(0):
+            self.facets(category="music", ordering='-rating', page=2)
@@ -1,13 +1,15 @@
 from django.urls import path
 
+from . import async_views
 from .views import (
     EventCreateAPIView, EventListAPIView, EventRetrieveAPIView, EventUpdateAPIView, EventDeleteAPIView,
-    RSVPView, MyEventsView, EventAttendeesView, LikeEventView,
-    CategoryListView, CategoryDetailView, TagListView, TagDetailView,
+    EventFacetsView, EventPurgeStatusView,
+    RSVPView, MyEventsView, EventAttendeesView, EventAttendeesExportView, LikeEventView, BatchActionsView,
+    CategoryListView, CategoryDetailView, TagListView, TagDetailView, AutocompleteView,
     EventStatsView, GlobalEventStatsView,
     EventMediaUploadRetrieveView,
     MyRSVPEventsView, MyLikedEventsView,
-    AddReadEventCommentView, DeleteEventCommentView, SubmitEventReviewView,
+    AddReadEventCommentView, DeleteEventCommentView, EventCommentThreadView, SubmitEventReviewView,
 
 )
 
@@ -15,22 +17,27 @@ from .views import (
 urlpatterns = [
     # event CRUD:
     path("events/", EventListAPIView.as_view(), name="event-list"),  # List all events
+    path("events/facets/", EventFacetsView.as_view(), name="event-facets"),  # Filter counts for the list
     path("events/create/", EventCreateAPIView.as_view(), name="event-create"),  # Create an event
     path("events/<int:id>/", EventRetrieveAPIView.as_view(), name="event-retrieve"),  # Retrieve a specific event
     path("events/<int:id>/update/", EventUpdateAPIView.as_view(), name="event-update"),  # Update an event
     path("events/<int:id>/delete/", EventDeleteAPIView.as_view(), name="event-delete"),  # Delete an event
+    path("events/<int:id>/delete/status/", EventPurgeStatusView.as_view(), name="event-delete-status"),
 
     # User interaction endpoints(like, RSVP)
     path('events/<int:event_id>/rsvp/', RSVPView.as_view(), name='rsvp'),
     path('my-events/', MyEventsView.as_view(), name='my-events'),
     path('events/<int:event_id>/attendees/', EventAttendeesView.as_view(), name='event-attendees'),
+    path('events/<int:event_id>/attendees/export/', EventAttendeesExportView.as_view(), name='event-attendees-export'),
     path('events/<int:event_id>/like/', LikeEventView.as_view(), name='like-event'),
+    path('batch/', BatchActionsView.as_view(), name='batch-actions'),  # Many likes/RSVPs/follows at once
 
     # optimizing tags, categories
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('categories/<int:id>/', CategoryDetailView.as_view(), name='category-detail'),
     path('tags/', TagListView.as_view(), name='tag-list'),
     path('tags/<int:id>/', TagDetailView.as_view(), name='tag-detail'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
 
     # statistics
     path('events/<int:event_id>/stats/', EventStatsView.as_view(), name='event-stats'),
@@ -46,7 +53,19 @@ urlpatterns = [
     # user comment and review functionality
     path('events/<int:event_id>/comments/', AddReadEventCommentView.as_view(), name='event-comments'),
     path('events/<int:event_id>/comments/<int:cid>/', DeleteEventCommentView.as_view(), name='delete-event-comment'),
+    path('events/<int:event_id>/comments/<int:cid>/thread/', EventCommentThreadView.as_view(),
+         name='event-comment-thread'),
     path('events/<int:event_id>/reviews/', SubmitEventReviewView.as_view(), name='submit-event-review'),
+
+    # async read endpoints (served without a thread per request under ASGI)
+    path('async/events/', async_views.event_list, name='async-event-list'),
+    path('async/events/<int:id>/', async_views.event_retrieve, name='async-event-retrieve'),
+    path('async/events/<int:event_id>/stats/', async_views.event_stats, name='async-event-stats'),
+    path('events/<int:event_id>/live/', async_views.event_live, name='event-live'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/categories/<int:id>/', async_views.category_detail, name='async-category-detail'),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
+    path('async/tags/<int:id>/', async_views.tag_detail, name='async-tag-detail'),
 ]
 
 
@@ -1,7 +1,18 @@
+import csv
 import hashlib
+import logging
+import uuid
 
 from django.core.cache import cache
-from django.db.models import Q, Count
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.views.decorators.vary import vary_on_headers
+from redis.exceptions import RedisError
 from rest_framework import generics, permissions, status
 from rest_framework.generics import get_object_or_404, GenericAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -9,17 +20,23 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticate
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .serializers import UserSerializer, TagSerializer, CategorySerializer, EventMediaSerializer, EventReviewSerializer, \
-    EventCommentSerializer, LikeEventSerializer
+    EventCommentSerializer, LikeEventSerializer, BatchSerializer
+from . import autocomplete, batch, membership, tag_index
+from .async_views import event_list_queryset
+from .conditional import event_conditional, event_list_etag
+from .filters import FILTER_PARAMS, facet_counts, filter_events, order_events
 from .models import Event, Tag, Category, EventMedia, EventReview, EventComment
-from .serializers import EventSerializer
+from .pagination import CustomPagination
+from .serializers import EventListSerializer, EventSerializer
+from .tasks import purge_event, purge_progress, purge_progress_key
 
-from rest_framework.pagination import PageNumberPagination
-from notifications.tasks import send_event_creation_email
+from rest_framework.pagination import CursorPagination
+from notifications.models import OutboxMessage
+from user.models import CustomUser
+from user.search import PrefixSearchFilter
+from TBC_final_project import async_cache, caching, metrics
 
-
-class CustomPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
+logger = logging.getLogger(__name__)
 
 
 class EventCreateAPIView(generics.CreateAPIView):
@@ -27,7 +44,14 @@ class EventCreateAPIView(generics.CreateAPIView):
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def perform_create(self, serializer):
+        # One transaction, so the follower notification in the outbox commits (or not) with the event.
+        with transaction.atomic():
+            serializer.save()
+
 
+# Outermost, so 304 responses carry the Vary header too: the payload and ETag depend on the user.
+@method_decorator(vary_on_headers('Authorization'), name='get')
 class EventListAPIView(generics.ListAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -40,50 +64,55 @@ class EventListAPIView(generics.ListAPIView):
         return hashlib.md5(query_string.encode('utf-8')).hexdigest()
 
     def get_queryset(self):
-        """
-        Fetch and cache the queryset based on query parameters.
-        """
-        # Generate a unique cache key based on request parameters
-        cache_key = f"events:{self.get_cache_key(self.request.GET)}"
-        cached_data = cache.get(cache_key)
-
-        if cached_data:
-            print("Returning cached data")
-            return cached_data
-
-        print("Querying database")
         queryset = Event.objects.select_related('category').prefetch_related('tags')
+        return order_events(filter_events(queryset, self.request.GET), self.request.GET)
 
-        # Get query parameters from the request
-        query = self.request.GET.get('query', None)
-        date = self.request.GET.get('date', None)
-        category = self.request.GET.get('category', None)
-        location = self.request.GET.get('location', None)
-        tags = self.request.GET.get('tags', None)
-
-        if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | Q(description__icontains=query)
-            )
-
-        if date:
-            queryset = queryset.filter(start_date=date)
-
-        if category:
-            queryset = queryset.filter(category__iexact=category)
-
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-
-        if tags:
-            tag_names = tags.split(',')
-            queryset = queryset.filter(tags__name__in=tag_names)
+    def list(self, request, *args, **kwargs):
+        """
+        Serve the serialized list from the cache; when an entry goes stale one request rebuilds it
+        while the others keep getting the stale copy. The shared entry has no per-user data: the
+        is_liked / is_attending flags are added afterwards from the user's membership sets.
+        The ETag comes from the entry actually served, and is checked here rather than by a
+        condition() decorator because the user is only known once DRF has authenticated the request.
+        """
+        cache_key = f"events:list:{self.get_cache_key(request.GET)}"
+        entry = caching.get_or_build(cache_key, lambda: self.build_list(request, *args, **kwargs), timeout=60)
+        etag = event_list_etag(entry, request.user)
+        if etag is not None:
+            not_modified = get_conditional_response(request._request, etag=etag)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+        response = Response(membership.annotate(entry['results'], request.user))
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+    def build_list(self, request, *args, **kwargs):
+        logger.debug("event list cache rebuild", extra={'query': request.GET.urlencode()})
+        # The build id is the list's ETag, so it changes exactly when the cached body does.
+        return {'build': uuid.uuid4().hex, 'results': super().list(request, *args, **kwargs).data}
+
+
+class EventFacetsView(APIView):
+    """
+    Counts per category, tag, city and status for the event list filters in the query string.
+    Cached under the list's key prefix, so whatever clears the list cache clears the facets too.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
 
-        cache.set(cache_key, queryset, timeout=60)
+    def get_cache_key(self, params):
+        query_string = '&'.join(f'{key}={value}' for key, value in params.items())
+        return f"events:list:facets:{hashlib.md5(query_string.encode('utf-8')).hexdigest()}"
 
-        return queryset
+    def get(self, request):
+        # Only the filters change the counts; paging and ordering share one entry.
+        params = {key: request.GET[key] for key in FILTER_PARAMS if request.GET.get(key)}
+        data = caching.get_or_build(self.get_cache_key(params), lambda: facet_counts(params), timeout=60)
+        return Response(data)
 
 
+@event_conditional
 class EventRetrieveAPIView(generics.RetrieveAPIView):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
@@ -103,45 +132,89 @@ class EventUpdateAPIView(generics.UpdateAPIView):
         event = self.get_object()
         previous_status = event.status
 
-        # Perform the update
-        updated_event = serializer.save()
-        print(previous_status)
-        print(updated_event.status)
-        # Check if the status was updated to "Canceled"
-        if previous_status != "canceled" and updated_event.status == "canceled":
-            # Send emails asynchronously via Celery
-            self.send_cancellation_emails(updated_event)
+        # Perform the update; any notification is recorded in the outbox in the same transaction
+        with transaction.atomic():
+            updated_event = serializer.save()
+            # Check if the status was updated to "Canceled"
+            if previous_status != "canceled" and updated_event.status == "canceled":
+                self.send_cancellation_emails(updated_event)
+        if previous_status != updated_event.status:
+            logger.info("event status changed", extra={
+                'event_id': updated_event.id,
+                'previous_status': previous_status,
+                'status': updated_event.status,
+            })
 
     def send_cancellation_emails(self, event):
-        # Assuming there's a ManyToMany field `registered_users` in Event model
-        registered_users = event.attendees.all()
-
-        subject = f"Event '{event.title}' Canceled"
-        message = (
-            f"Dear Participant,\n\n"
-            f"We regret to inform you that the event '{event.title}', "
-            f"scheduled for {event.start_date}, has been canceled.\n\n"
-            "We apologize for any inconvenience caused.\n\n"
-            "Thank you."
-        )
-
-        # Trigger the Celery task for each registered user
-        for user in registered_users:
-            print(user)
-            if user.email:  # Ensure user has an email
-                send_event_creation_email.delay(user.email, subject, message)
+        # Fanned out to every attendee on the `bulk` queue by the outbox dispatcher. Keyed by the version
+        # this cancellation creates, so cancelling again after a reschedule sends a new notice.
+        Event.bump_version([event.pk])
+        version = Event.objects.filter(pk=event.pk).values_list('version', flat=True).get()
+        OutboxMessage.enqueue(OutboxMessage.EVENT_CANCELED, f"event_canceled:{event.id}:{version}", event_id=event.id)
 
 
 # Delete an event
 class EventDeleteAPIView(generics.DestroyAPIView):
+    """
+    Hide the event at once and leave removing its attendees, comments, reviews and media to purge_event.
+    """
     queryset = Event.objects.all()
     lookup_field = "id"
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def destroy(self, request, *args, **kwargs):
+        event = self.get_object()
+        cache.set(purge_progress_key(event.pk), {'event_id': event.pk, 'status': 'queued', 'deleted': {}},
+                  timeout=24 * 3600)
+        with transaction.atomic():
+            Event.all_objects.filter(pk=event.pk).update(
+                is_deleted=True, deleted_at=timezone.now(), version=F('version') + 1, updated_at=timezone.now()
+            )
+            transaction.on_commit(lambda: purge_event.delay(event.pk))
+            # The event leaves autocomplete and the tag index, and its category and tags lose one event each.
+            tag_ids = list(event.tags.values_list('pk', flat=True))
+            autocomplete.schedule_sync('event', [event.pk])
+            autocomplete.schedule_sync('category', [event.category_id])
+            autocomplete.schedule_sync('tag', tag_ids)
+            tag_index.run_after_commit(tag_index.update, [(tag_id, event.pk) for tag_id in tag_ids], False)
+            transaction.on_commit(lambda: self.drop_cached_pages(event.pk))
+        return Response(
+            {"message": "Event deleted. Its related data is being removed in the background."},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+    def drop_cached_pages(self, event_id):
+        """
+        Cached pages would keep showing the event until they expire: the sync list and its facets,
+        the async list pages and the event's first comment page.
+        """
+        async_cache.delete_matching('events:page:*')
+        try:
+            cache.delete(EventComment.first_page_cache_key(event_id))
+            if hasattr(cache, 'delete_pattern'):  # django_redis
+                cache.delete_pattern('events:list:*')
+        except RedisError as exc:
+            logger.warning("could not drop cached event lists", extra={'event_id': event_id, 'error': str(exc)})
+
+
+class EventPurgeStatusView(APIView):
+    """
+    Progress of the background cleanup after an event was deleted.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id):
+        progress = purge_progress(id)
+        if progress is None:
+            raise Http404
+        return Response(progress)
+
 
 class RSVPView(GenericAPIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'rsvp'
 
     def post(self, request, event_id):
         """
@@ -149,12 +222,18 @@ class RSVPView(GenericAPIView):
         """
         event = get_object_or_404(Event, id=event_id)
 
-        if event.status == "Canceled":
+        if event.status == "canceled":
             return Response(
                 {"error": "You cannot RSVP to a canceled event."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if not event.registration_open:
+            return Response(
+                {"error": "Registration for this event is closed."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         if request.user in event.attendees.all():
             return Response(
                 {"message": "You have already RSVP'd to this event."},
@@ -188,17 +267,108 @@ class MyEventsView(generics.ListAPIView):
         return Event.objects.filter(organizer=self.request.user)
 
 
+class AttendeeCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
+
+
 class EventAttendeesView(generics.ListAPIView):
+    """
+    An event's attendees, a page at a time. `?search=` matches the start of the username, or for the
+    event's organizer also of the email.
+    """
     serializer_class = UserSerializer
+    pagination_class = AttendeeCursorPagination
+    permission_classes = [IsAuthenticated]
+    filter_backends = [PrefixSearchFilter]
+
+    @property
+    def search_fields(self):
+        # Searching by email would let anyone check whether a given address is attending.
+        event = getattr(self, 'event', None)  # set by get_queryset
+        if event is not None and event.organizer_id == self.request.user.id:
+            return ['username', 'email']
+        return ['username']
 
     def get_queryset(self):
-        event_id = self.kwargs.get('event_id')
-        event = get_object_or_404(Event, id=event_id)
-        return event.attendees.all()
+        self.event = get_object_or_404(Event.objects.only('id', 'organizer_id'), id=self.kwargs.get('event_id'))
+        return CustomUser.objects.filter(attendees__id=self.event.id).only('id', 'username', 'email')
+
+
+class Echo:
+    """
+    File-like object whose write() hands the value back, so csv.writer can feed a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def attendee_chunk(event_id, last_id, chunk_size):
+    return (
+        CustomUser.objects.filter(attendees__id=event_id, id__gt=last_id).order_by('id')
+        .values_list('id', 'username', 'email')[:chunk_size]
+    )
+
+
+def attendee_rows(event_id, chunk_size=2000):
+    """
+    CSV rows for an event's attendees, fetched in keyset-paginated chunks so memory stays flat.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(['id', 'username', 'email'])
+    last_id = 0
+    while True:
+        chunk = list(attendee_chunk(event_id, last_id, chunk_size))
+        for row in chunk:
+            yield writer.writerow(row)
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+async def aattendee_rows(event_id, chunk_size=2000):
+    """
+    attendee_rows for ASGI. Django would drain a sync iterator into a list before sending anything
+    there, so each chunk is fetched asynchronously instead.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(['id', 'username', 'email'])
+    last_id = 0
+    while True:
+        chunk = [row async for row in attendee_chunk(event_id, last_id, chunk_size)]
+        for row in chunk:
+            yield writer.writerow(row)
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+class EventAttendeesExportView(APIView):
+    """
+    Download an event's full attendee list as CSV (organizer only).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id):
+        event = get_object_or_404(Event.objects.only('id', 'organizer_id'), id=event_id)
+        if event.organizer_id != request.user.id:
+            return Response(
+                {"error": "Only the organizer can export the attendee list."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        # Each server streams only its own kind of iterator; the other would be buffered in full.
+        rows = aattendee_rows(event.id) if isinstance(request._request, ASGIRequest) else attendee_rows(event.id)
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="event-{event.id}-attendees.csv"'
+        return response
 
 
 class LikeEventView(GenericAPIView):
     serializer_class = LikeEventSerializer
+    throttle_scope = 'like'
 
     def post(self, request, event_id):
         """
@@ -215,8 +385,9 @@ class LikeEventView(GenericAPIView):
             )
 
         event.likes.add(request.user)
-        event.likes_number += 1
-        event.save()
+        # A queryset update, so the version bumped by the likes signal isn't overwritten with a stale one.
+        Event.objects.filter(pk=event.pk).update(likes_number=F('likes_number') + 1)
+        autocomplete.schedule_sync('event', [event.pk])
         return Response({"message": "Event liked successfully!"}, status=status.HTTP_201_CREATED)
 
     def delete(self, request, event_id):
@@ -234,43 +405,111 @@ class LikeEventView(GenericAPIView):
             )
 
         event.likes.remove(request.user)
-        event.likes_number -= 1
-        event.save()
+        Event.objects.filter(pk=event.pk).update(likes_number=F('likes_number') - 1)
+        autocomplete.schedule_sync('event', [event.pk])
         return Response({"message": "Event unliked successfully."}, status=status.HTTP_200_OK)
 
 
-class TagListView(generics.ListAPIView):
+class BatchActionsView(GenericAPIView):
+    """
+    Apply an ordered list of like / RSVP / follow operations in one transaction (see event/batch.py).
+    The response carries one result per operation; the request only fails as a whole when the list is invalid.
+    """
+    serializer_class = BatchSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'batch'
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = batch.execute(request.user, serializer.validated_data['operations'])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class ReferenceDataListMixin:
+    """
+    Serve a small, rarely changing list from the two-tier reference cache (invalidated in event/signals.py).
+    """
+    reference_cache_key = None
+
+    def list(self, request, *args, **kwargs):
+        data = caching.reference_data.get_or_build(
+            self.reference_cache_key, lambda: self.get_serializer(self.get_queryset(), many=True).data
+        )
+        return Response(data)
+
+
+class ReferenceDataDetailMixin:
+    reference_cache_prefix = None
+
+    def retrieve(self, request, *args, **kwargs):
+        key = f"{self.reference_cache_prefix}:{kwargs[self.lookup_field]}"
+        data = caching.reference_data.get_or_build(key, lambda: self.get_serializer(self.get_object()).data)
+        return Response(data)
+
+
+class TagListView(ReferenceDataListMixin, generics.ListAPIView):
     """
     List all tags for events.
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    reference_cache_key = 'tags'
 
 
-class TagDetailView(generics.RetrieveAPIView):
+class TagDetailView(ReferenceDataDetailMixin, generics.RetrieveAPIView):
     """
     Get details of a specific tag.
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     lookup_field = 'id'
+    reference_cache_prefix = 'tag'
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ReferenceDataListMixin, generics.ListAPIView):
     """
     List all event categories.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    reference_cache_key = 'categories'
 
 
-class CategoryDetailView(generics.RetrieveAPIView):
+class CategoryDetailView(ReferenceDataDetailMixin, generics.RetrieveAPIView):
     """
     Get details of a specific category.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'id'
+    reference_cache_prefix = 'category'
+
+
+class AutocompleteView(APIView):
+    """
+    Search-as-you-type: ``?q=jaz&types=tag,event&limit=5`` returns the most popular tags, categories
+    and event titles starting with ``q``, answered from the Redis prefix index without touching the database.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        types = request.GET.get('types')
+        kinds = types.split(',') if types else list(autocomplete.KINDS)
+        unknown = [kind for kind in kinds if kind not in autocomplete.KINDS]
+        if unknown:
+            return Response({"error": f"Unknown types: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, autocomplete.MAX_LIMIT))
+        try:
+            results = autocomplete.search(request.GET.get('q', ''), kinds, limit)
+        except RedisError:
+            logger.warning("autocomplete index unavailable")
+            results = {kind: [] for kind in kinds}
+        return Response(results)
 
 
 class EventStatsView(GenericAPIView):
@@ -312,6 +551,7 @@ class GlobalEventStatsView(GenericAPIView):
         return Response(stats, status=status.HTTP_200_OK)
 
 
+@event_conditional
 class EventMediaUploadRetrieveView(APIView):
     """
     Upload event media (image/video).
@@ -339,7 +579,7 @@ class EventMediaUploadRetrieveView(APIView):
         event = get_object_or_404(Event, id=event_id)
 
         media_files = request.FILES.getlist('file')  # Multiple files
-        print(request.FILES)
+        logger.debug("event media upload", extra={'event_id': event.id, 'file_count': len(media_files)})
         if not media_files:
             return Response({"error": "No media files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -358,62 +598,103 @@ class EventMediaUploadRetrieveView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class MyRSVPEventsView(APIView):
+class MembershipEventsView(generics.ListAPIView):
     """
-    Retrieve a list of events the user has RSVPed to.
+    A page of the events in one of the user's membership sets (event/membership.py), newest first.
+    Only the page's ids are read from the set, and only their events are loaded.
     """
     permission_classes = [IsAuthenticated]
-    serializer_class = EventSerializer
+    serializer_class = EventListSerializer
+    pagination_class = CustomPagination
+    relation = None
 
-    def get(self, request):
-        user = request.user
-        # Get events the user has RSVPed to
-        events = Event.objects.filter(attendees=user)
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        return membership.Members(self.relation, self.request.user.pk)
 
+    def list(self, request, *args, **kwargs):
+        ids = self.paginate_queryset(self.get_queryset())
+        events = event_list_queryset().in_bulk(ids)
+        # A soft-deleted event stays in the set until it is purged; it is left out of the page.
+        serializer = self.get_serializer([events[pk] for pk in ids if pk in events], many=True)
+        return self.get_paginated_response(membership.annotate(serializer.data, request.user))
 
-class MyLikedEventsView(APIView):
+
+class MyRSVPEventsView(MembershipEventsView):
+    """
+    Retrieve a list of events the user has RSVPed to.
+    """
+    relation = 'attending'
+
+
+class MyLikedEventsView(MembershipEventsView):
     """
     Retrieve a list of events the user has liked.
     """
-    permission_classes = [IsAuthenticated]
-    serializer_class = EventSerializer
+    relation = 'liked'
 
-    def get(self, request):
-        user = request.user
-        # Get events the user has liked
-        events = Event.objects.filter(likes=user)
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
+
+class CommentCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
 
 
+@event_conditional
 class AddReadEventCommentView(APIView):
     """
-    Add or read a comment to an event.
+    Add a comment (or a reply, with `parent`) to an event, or read its top-level comments page by page.
     """
     serializer_class = EventCommentSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'comment'
+    pagination_class = CommentCursorPagination
 
     def get(self, request, event_id):
-        event = get_object_or_404(Event, id=event_id)
-        comments = EventComment.objects.filter(event=event)
-        serializer = EventCommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        # The first page is what almost every reader asks for, so it is cached until a comment changes.
+        first_page = not request.query_params.keys() & {'cursor', 'page_size'}
+        cache_key = EventComment.first_page_cache_key(event_id)
+        if first_page:
+            cached_data = cache.get(cache_key)
+            metrics.record_cache(hit=cached_data is not None)
+            if cached_data is not None:
+                return Response(cached_data)
+
+        if not Event.objects.filter(id=event_id).exists():
+            raise Http404
+        comments = EventComment.objects.filter(event_id=event_id, parent=None).select_related('user', 'event')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        response = paginator.get_paginated_response(EventCommentSerializer(page, many=True).data)
+
+        if first_page:
+            cache.set(cache_key, response.data)
+        return response
 
     def post(self, request, event_id):
         event = get_object_or_404(Event, id=event_id)
-        comment = EventComment.objects.create(
-            user=request.user,
-            event=event,
-            content=request.data.get('content')
-        )
+        serializer = EventCommentSerializer(data=request.data, context={'request': request, 'event': event})
+        serializer.is_valid(raise_exception=True)
+        comment = serializer.save(user=request.user, event=event)
         return Response(
-            {"message": "Comment added successfully."},
+            {"message": "Comment added successfully.", "comment": EventCommentSerializer(comment).data},
             status=status.HTTP_201_CREATED
         )
 
 
+class EventCommentThreadView(APIView):
+    """
+    Read a comment together with all of its replies, in thread order.
+    """
+    serializer_class = EventCommentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id, cid):
+        root = get_object_or_404(EventComment.objects.only('id', 'path'), id=cid, event_id=event_id)
+        comments = root.thread().select_related('user', 'event')
+        return Response(EventCommentSerializer(comments, many=True).data)
+
+
 class DeleteEventCommentView(APIView):
     """
     Delete a comment from an event.
@@ -436,31 +717,56 @@ class DeleteEventCommentView(APIView):
         return Response({"message": "Comment deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
 
+@event_conditional
 class SubmitEventReviewView(APIView):
     """
-    Submit a review for an event.
+    Read an event's reviews, or submit, edit (PUT/PATCH) and withdraw (DELETE) your own review.
+    Each user has at most one review per event.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = EventReviewSerializer
 
     def get(self, request, event_id):
         event = get_object_or_404(Event, id=event_id)
-        reviews = EventReview.objects.filter(event=event)
+        reviews = EventReview.objects.filter(event=event).select_related('user', 'event')
         serializer = EventReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
     def post(self, request, event_id):
         event = get_object_or_404(Event, id=event_id)
-        review = EventReview.objects.create(
-            user=request.user,
-            event=event,
-            rating=request.data.get('rating'),
-            content=request.data.get('content')
-        )
+        serializer = EventReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if EventReview.objects.filter(user=request.user, event=event).exists():
+            return Response(
+                {"error": "You have already reviewed this event."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            serializer.save(user=request.user, event=event)
+        except IntegrityError:
+            # Lost a race with a concurrent submission from the same user.
+            return Response(
+                {"error": "You have already reviewed this event."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(
             {"message": "Review submitted successfully."},
             status=status.HTTP_201_CREATED
         )
 
+    def put(self, request, event_id, partial=False):
+        review = get_object_or_404(EventReview.objects.select_related('user', 'event'),
+                                   user=request.user, event_id=event_id)
+        serializer = EventReviewSerializer(review, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def patch(self, request, event_id):
+        return self.put(request, event_id, partial=True)
 
+    def delete(self, request, event_id):
+        review = get_object_or_404(EventReview, user=request.user, event_id=event_id)
+        review.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
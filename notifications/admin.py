@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from TBC_final_project.admin import ScalableModelAdmin
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(ScalableModelAdmin):
+    list_display = ['id', 'kind', 'idempotency_key', 'created_at', 'dispatched_at', 'attempts']
+    list_filter = ['kind']
+    search_fields = ['=idempotency_key']
+    readonly_fields = ['created_at']
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notifications'
+
+    def ready(self):
+        from TBC_final_project import metrics
+        from .models import OutboxMessage
+
+        metrics.registry.register_gauge('outbox_backlog', "Notifications waiting to be dispatched.",
+                                        OutboxMessage.backlog)
+        metrics.registry.register_gauge('outbox_failed', "Notifications that gave up after repeated failures.",
+                                        OutboxMessage.failed)
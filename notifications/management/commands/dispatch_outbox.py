@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.models import OutboxMessage
+from notifications.outbox import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = "Hand pending outbox notifications to Celery in batches (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="Keep draining until interrupted.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = dispatch_batch(options['batch_size'])
+            if options['verbosity'] > 1 and sent:
+                self.stdout.write(f"dispatched {sent}, backlog {OutboxMessage.backlog()}")
+            if not options['loop']:
+                break
+            if sent < options['batch_size']:
+                # A full batch means there is probably more waiting; otherwise wait for new rows.
+                time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='kind',
+            field=models.CharField(choices=[('new_event', 'New event'), ('event_canceled', 'Event canceled'), ('event_reminder', 'Event reminder')], max_length=50),
+        ),
+    ]
@@ -1,3 +1,70 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+
+# A message that failed this many times is left for inspection instead of blocking the queue.
+MAX_ATTEMPTS = 5
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification waiting to be handed to Celery.
+
+    Rows are written in the same transaction as the change that triggers them, so a rolled-back change
+    sends nothing and a Redis outage loses nothing; `manage.py dispatch_outbox` drains them in batches.
+    """
+    NEW_EVENT = 'new_event'
+    EVENT_CANCELED = 'event_canceled'
+    EVENT_REMINDER = 'event_reminder'
+    KIND_CHOICES = [
+        (NEW_EVENT, 'New event'),
+        (EVENT_CANCELED, 'Event canceled'),
+        (EVENT_REMINDER, 'Event reminder'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    # One notification per key: enqueueing the same key again is a no-op, which coalesces duplicates.
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Only pending rows are scanned by the dispatcher and the backlog gauge.
+            models.Index(fields=['id'], condition=Q(dispatched_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return self.idempotency_key
+
+    @classmethod
+    def enqueue(cls, kind, idempotency_key, **payload):
+        """
+        Record a notification; call inside the transaction that makes the change.
+        """
+        cls.enqueue_many(kind, [(idempotency_key, payload)])
+
+    @classmethod
+    def enqueue_many(cls, kind, messages, batch_size=1000):
+        """
+        Record ``(idempotency_key, payload)`` pairs with multi-row INSERTs; keys already present are skipped.
+        """
+        cls.objects.bulk_create(
+            [cls(kind=kind, idempotency_key=key, payload=payload) for key, payload in messages],
+            ignore_conflicts=True, batch_size=batch_size,
+        )
+
+    @classmethod
+    def pending(cls):
+        return cls.objects.filter(dispatched_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+
+    @classmethod
+    def backlog(cls):
+        return cls.pending().count()
+
+    @classmethod
+    def failed(cls):
+        return cls.objects.filter(dispatched_at__isnull=True, attempts__gte=MAX_ATTEMPTS).count()
@@ -0,0 +1,52 @@
+"""
+Drains OutboxMessage rows into Celery.
+
+Each message kind maps to the task that fans it out; the message's idempotency key travels with the
+task down to every email chunk, so a redelivered task (acks_late) or a re-dispatched row doesn't
+send the same email twice.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .tasks import notify_attendees_of_cancellation, notify_attendees_of_reminder, notify_followers_of_new_event
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    OutboxMessage.NEW_EVENT: lambda message: notify_followers_of_new_event.delay(
+        message.payload['event_id'], idempotency_key=message.idempotency_key
+    ),
+    OutboxMessage.EVENT_CANCELED: lambda message: notify_attendees_of_cancellation.delay(
+        message.payload['event_id'], idempotency_key=message.idempotency_key
+    ),
+    OutboxMessage.EVENT_REMINDER: lambda message: notify_attendees_of_reminder.delay(
+        message.payload['event_id'], idempotency_key=message.idempotency_key
+    ),
+}
+
+
+def dispatch_batch(batch_size=500):
+    """
+    Hand up to ``batch_size`` pending messages to Celery, oldest first; returns how many were sent.
+    Stops at the first failure (usually the broker being down) and leaves the rest for the next run.
+    """
+    with transaction.atomic():
+        # skip_locked lets several dispatchers share the table on databases that support it.
+        messages = list(OutboxMessage.pending().select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        dispatched = []
+        for message in messages:
+            try:
+                HANDLERS[message.kind](message)
+            except Exception as exc:
+                logger.warning("outbox dispatch failed", extra={
+                    'message_id': message.id, 'kind': message.kind, 'error': str(exc),
+                })
+                OutboxMessage.objects.filter(pk=message.pk).update(attempts=F('attempts') + 1, last_error=str(exc))
+                break
+            dispatched.append(message.pk)
+        OutboxMessage.objects.filter(pk__in=dispatched).update(dispatched_at=timezone.now())
+    return len(dispatched)
@@ -1,20 +1,124 @@
+import logging
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import send_mass_mail
 from django.conf import settings
 
+from event.models import Event
 
-@shared_task
-def send_event_creation_email(user_email, subject, message):
+logger = logging.getLogger(__name__)
+
+# Recipients per send_bulk_email task; each chunk is sent over one SMTP connection.
+FAN_OUT_CHUNK_SIZE = 500
+# How long a sent chunk's idempotency key is remembered.
+SENT_KEY_TIMEOUT = 7 * 24 * 3600
+# A failed chunk is retried this many times, SEND_RETRY_DELAY seconds apart and doubling each time.
+SEND_MAX_RETRIES = 5
+SEND_RETRY_DELAY = 60
+
+
+@shared_task(bind=True, max_retries=SEND_MAX_RETRIES)
+def send_bulk_email(self, recipients, subject, message, idempotency_key=None):
     """
-    Celery task to send the email to a user about a new event.
+    Send the same message to each recipient separately (no shared To: line) over a single connection.
+    Routed to the `bulk` queue. A chunk whose ``idempotency_key`` was already sent is skipped; the key
+    is recorded only after a successful send, and a failed send is retried, so delivery is at least once.
     """
+    sent_key = f"email:sent:{idempotency_key}" if idempotency_key else None
+    if sent_key and cache.get(sent_key):
+        logger.info("skipping already sent email chunk", extra={'idempotency_key': idempotency_key})
+        return
+    messages = ((subject, message, settings.DEFAULT_FROM_EMAIL, [recipient]) for recipient in recipients)
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user_email],
-            # fail_silently=True
+        send_mass_mail(messages)
+    except Exception as exc:
+        logger.exception("error sending bulk email", extra={'recipients': len(recipients), 'subject': subject})
+        raise self.retry(exc=exc, countdown=SEND_RETRY_DELAY * (2 ** self.request.retries))
+    if sent_key:
+        cache.set(sent_key, 1, timeout=SENT_KEY_TIMEOUT)
+
+
+def fan_out(recipients, subject, message, idempotency_key=None):
+    """
+    Queue ``send_bulk_email`` for every FAN_OUT_CHUNK_SIZE addresses of the ``recipients`` queryset,
+    paging by primary key so a huge audience is never loaded at once. Chunk keys are derived from
+    ``idempotency_key`` and the chunk's first recipient, so repeating the fan-out repeats the same keys.
+    """
+    last_id = 0
+    chunks = 0
+    while True:
+        chunk = list(
+            recipients.filter(id__gt=last_id).exclude(email='').order_by('id')
+            .values_list('id', 'email')[:FAN_OUT_CHUNK_SIZE]
         )
-    except Exception as e:
-        print(f"Error sending email: {e}")
+        if not chunk:
+            break
+        chunk_key = f"{idempotency_key}:{chunk[0][0]}" if idempotency_key else None
+        send_bulk_email.delay([email for _, email in chunk], subject, message, idempotency_key=chunk_key)
+        chunks += 1
+        last_id = chunk[-1][0]
+    return chunks
+
+
+@shared_task
+def notify_followers_of_new_event(event_id, idempotency_key=None):
+    """
+    Email the organizer's followers about a new event. Routed to the `bulk` queue.
+    """
+    event = Event.objects.select_related('organizer').filter(id=event_id).first()
+    if event is None:
+        return
+    organizer = event.organizer
+    subject = f"New Event Created by {organizer.username}"
+    message = (
+        f"Hello,\n\n{organizer.username} has created a new event: '{event.title}'.\n"
+        f"Event Details:\n"
+        f" - Description: {event.description}\n"
+        f" - Start Date: {event.start_date}\n"
+        f" - Location: {event.location}\n"
+        f" - Link: {event.link if event.link else 'No link provided'}\n\n"
+        f"Don't miss it!"
+    )
+    chunks = fan_out(organizer.followers.all(), subject, message, idempotency_key)
+    logger.info("queued new event emails", extra={'event_id': event_id, 'chunks': chunks})
+
+
+@shared_task
+def notify_attendees_of_cancellation(event_id, idempotency_key=None):
+    """
+    Email everyone who RSVP'd that the event was canceled. Routed to the `bulk` queue.
+    """
+    event = Event.objects.filter(id=event_id).first()
+    if event is None:
+        return
+    subject = f"Event '{event.title}' Canceled"
+    message = (
+        f"Dear Participant,\n\n"
+        f"We regret to inform you that the event '{event.title}', "
+        f"scheduled for {event.start_date}, has been canceled.\n\n"
+        "We apologize for any inconvenience caused.\n\n"
+        "Thank you."
+    )
+    chunks = fan_out(event.attendees.all(), subject, message, idempotency_key)
+    logger.info("queued cancellation emails", extra={'event_id': event_id, 'chunks': chunks})
+
+
+@shared_task
+def notify_attendees_of_reminder(event_id, idempotency_key=None):
+    """
+    Remind everyone who RSVP'd that the event starts tomorrow. Routed to the `bulk` queue.
+    """
+    event = Event.objects.filter(id=event_id, status='scheduled').first()
+    if event is None:
+        return
+    subject = f"Reminder: '{event.title}' starts tomorrow"
+    message = (
+        f"Dear Participant,\n\n"
+        f"This is a reminder that '{event.title}' starts on {event.start_date}.\n"
+        f" - Location: {event.location}\n"
+        f" - Link: {event.link if event.link else 'No link provided'}\n\n"
+        "See you there!"
+    )
+    chunks = fan_out(event.attendees.all(), subject, message, idempotency_key)
+    logger.info("queued reminder emails", extra={'event_id': event_id, 'chunks': chunks})
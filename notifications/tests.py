@@ -1,3 +1,112 @@
-from django.test import TestCase
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from TBC_final_project.testing import RedisTestCase
+from .models import MAX_ATTEMPTS, OutboxMessage
+from .outbox import dispatch_batch
+from . import tasks
+from .tasks import fan_out, send_bulk_email
+
+
+class OutboxDispatchTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Jazz Night", self.create_user('organizer'))
+
+    def test_new_event_is_recorded_once(self):
+        OutboxMessage.enqueue(OutboxMessage.NEW_EVENT, f"new_event:{self.event.pk}", event_id=self.event.pk)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.kind, message.payload), (OutboxMessage.NEW_EVENT, {'event_id': self.event.pk}))
+
+    @mock.patch('notifications.outbox.notify_followers_of_new_event')
+    def test_dispatch_hands_pending_messages_to_celery(self, task):
+        self.assertEqual(dispatch_batch(), 1)
+
+        task.delay.assert_called_once_with(self.event.pk, idempotency_key=f"new_event:{self.event.pk}")
+        self.assertEqual(OutboxMessage.backlog(), 0)
+        self.assertEqual(dispatch_batch(), 0)
+
+    @mock.patch('notifications.outbox.notify_followers_of_new_event')
+    def test_failed_dispatch_is_retried(self, task):
+        task.delay.side_effect = ConnectionError("broker down")
+
+        with self.assertLogs('notifications.outbox', 'WARNING'):
+            self.assertEqual(dispatch_batch(), 0)
+
+        message = OutboxMessage.objects.get()
+        self.assertIsNone(message.dispatched_at)
+        self.assertEqual((message.attempts, message.last_error), (1, "broker down"))
+        task.delay.side_effect = None
+        self.assertEqual(dispatch_batch(), 1)
+
+    @mock.patch('notifications.outbox.notify_followers_of_new_event')
+    def test_messages_that_keep_failing_are_set_aside(self, task):
+        OutboxMessage.objects.update(attempts=MAX_ATTEMPTS)
+        self.assertEqual(dispatch_batch(), 0)
+        task.delay.assert_not_called()
+        self.assertEqual(OutboxMessage.failed(), 1)
+
+
+class SendBulkEmailTests(RedisTestCase):
+    recipients = ["a@example.com", "b@example.com"]
+
+    def test_each_recipient_gets_their_own_email(self):
+        send_bulk_email(self.recipients, "Subject", "Body", idempotency_key="chunk")
+        self.assertEqual([message.to for message in mail.outbox], [[recipient] for recipient in self.recipients])
+
+    def test_a_sent_chunk_is_not_sent_again(self):
+        send_bulk_email(self.recipients, "Subject", "Body", idempotency_key="chunk")
+        with self.assertLogs('notifications.tasks', 'INFO'):
+            send_bulk_email(self.recipients, "Subject", "Body", idempotency_key="chunk")
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_a_failed_chunk_is_not_marked_sent(self):
+        with mock.patch('notifications.tasks.send_mass_mail', side_effect=SMTPException("down")):
+            with self.assertRaises(SMTPException), self.assertLogs('notifications.tasks', 'ERROR'):
+                send_bulk_email(self.recipients, "Subject", "Body", idempotency_key="chunk")
+        send_bulk_email(self.recipients, "Subject", "Body", idempotency_key="chunk")
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class OutboxRecordingTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = self.create_user('organizer')
+
+    def test_rolled_back_events_leave_no_message(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_event("Jazz Night", self.organizer)
+            raise RuntimeError("rollback")
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_each_cancellation_is_its_own_notice(self):
+        event = self.create_event("Jazz Night", self.organizer)
+        client = APIClient()
+        client.force_authenticate(self.organizer)
+        url = reverse('event-update', args=[event.pk])
+        with self.assertLogs('event.views', 'INFO'):
+            for status in ('canceled', 'scheduled', 'canceled', 'canceled'):
+                client.patch(url, {'status': status}, format='json')
+
+        notices = OutboxMessage.objects.filter(kind=OutboxMessage.EVENT_CANCELED)
+        self.assertEqual(notices.count(), 2)
+        self.assertEqual({notice.payload['event_id'] for notice in notices}, {event.pk})
+
+    @mock.patch.object(tasks, 'FAN_OUT_CHUNK_SIZE', 2)
+    @mock.patch.object(tasks, 'send_bulk_email')
+    def test_fan_out_repeats_the_same_chunk_keys(self, task):
+        followers = [self.create_user(f"fan{number}") for number in range(5)]
+        self.organizer.followers.add(*followers)
+
+        self.assertEqual(fan_out(self.organizer.followers.all(), "Subject", "Body", "new_event:1"), 3)
+        first_keys = [call.kwargs['idempotency_key'] for call in task.delay.call_args_list]
+        fan_out(self.organizer.followers.all(), "Subject", "Body", "new_event:1")
+
+        self.assertEqual(len(set(first_keys)), 3)
+        self.assertEqual([call.kwargs['idempotency_key'] for call in task.delay.call_args_list[3:]], first_keys)
+        self.assertEqual(sum(len(call.args[0]) for call in task.delay.call_args_list[:3]), 5)
@@ -1,4 +1,22 @@
 from django.contrib import admin
+
+from TBC_final_project.admin import ScalableModelAdmin
 from .models import CustomUser
+from .search import prefix_filter
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(ScalableModelAdmin):
+    list_display = ['id', 'email', 'username', 'is_active', 'is_staff', 'date_joined']
+    list_filter = ['is_active', 'is_staff']
+    # Matched as a prefix through the Lower('email') index (user/search.py).
+    search_fields = ['email']
+    search_id_fields = ['id']
+    raw_id_fields = ['followers']
+    filter_horizontal = ['groups', 'user_permissions']
 
-admin.site.register(CustomUser)
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term and not term.isdigit():
+            return prefix_filter(queryset, term, self.search_fields), False
+        return super().get_search_results(request, queryset, search_term)
@@ -0,0 +1,92 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from TBC_final_project import metrics
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+# The only columns kept in the cache; anything else is deferred and loaded from the database on access.
+CACHED_FIELDS = ('id', 'email', 'username', 'is_active', 'is_staff', 'is_superuser')
+CACHE_ERRORS = (ConnectionInterrupted, RedisError)
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    try:
+        cache.delete(user_cache_key(user_id))
+    except CACHE_ERRORS:
+        # The entry can then outlive the change by up to AUTH_USER_CACHE_TIMEOUT seconds.
+        logger.warning("could not drop cached user", extra={'user_id': user_id})
+
+
+def cache_entry(user):
+    entry = {field: getattr(user, field) for field in CACHED_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        # The digest tokens carry, never the password hash itself.
+        entry['password_md5'] = get_md5_hash_password(user.password)
+    return entry
+
+
+def user_from_entry(entry):
+    # from_db() takes the loaded values in model field order.
+    names = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in CACHED_FIELDS]
+    return CustomUser.from_db('default', names, [entry[name] for name in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the token's user from the cache instead of querying
+    CustomUser on every request. Entries expire after AUTH_USER_CACHE_TIMEOUT seconds and are
+    dropped whenever the user is saved or deleted (see user/signals.py).
+
+    Only CACHED_FIELDS are stored; the user comes back as a model instance with every other field
+    deferred, so reading one costs a query and save() writes only the cached fields. Queryset
+    ``.update()`` calls on users skip the signals: anything that deactivates users that way must call
+    invalidate_cached_user too, or the old entry is served until it expires. When the cache is
+    unavailable every request reads the user from the database.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        try:
+            entry = cache.get(key)
+        except CACHE_ERRORS:
+            logger.warning("user cache unavailable", extra={'user_id': user_id})
+            return super().get_user(validated_token)
+        metrics.record_cache(hit=entry is not None)
+        if entry is None:
+            # The parent class does the lookup plus the active/revocation checks.
+            user = super().get_user(validated_token)
+            try:
+                cache.set(key, cache_entry(user), timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+            except CACHE_ERRORS:
+                logger.warning("user cache unavailable", extra={'user_id': user_id})
+            return user
+
+        # A cached user still has to pass the same checks as a freshly loaded one.
+        if not entry['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry.get('password_md5'):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user_from_entry(entry)
@@ -0,0 +1,49 @@
+"""
+Case-insensitive prefix search over text columns that can use an index.
+
+``istartswith`` (DRF's ``^`` search prefix) compiles to ``UPPER(col) LIKE UPPER(...)`` on PostgreSQL
+and to a bare ``LIKE`` on SQLite, and neither can use a plain btree index on the column. Instead the
+term is lowercased and matched as a range on ``LOWER(col)``, which the ``Lower(...)`` expression
+indexes on CustomUser (email, username) and Event (title) serve on both backends.
+"""
+from django.db.models import Q
+from django.db.models.functions import Lower
+from rest_framework.filters import SearchFilter
+
+
+def prefix_range(term):
+    # Every string starting with ``term`` sorts in [term, term with its last character incremented).
+    return term, term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def prefix_filter(queryset, term, fields):
+    """
+    Rows where one of ``fields`` starts with ``term``, ignoring case.
+    """
+    term = term.strip().lower()
+    if not term:
+        return queryset
+    low, high = prefix_range(term)
+    condition = Q()
+    for field in fields:
+        key = f'{field}_lower'
+        queryset = queryset.alias(**{key: Lower(field)})
+        # The startswith recheck keeps the result exact under collations that don't sort by code point.
+        condition |= Q(**{f'{key}__gte': low, f'{key}__lt': high, f'{key}__startswith': term})
+    return queryset.filter(condition)
+
+
+class PrefixSearchFilter(SearchFilter):
+    """
+    SearchFilter whose terms match the start of the view's ``search_fields`` through prefix_filter.
+    Several terms must all match.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'search_fields', None)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return queryset
+        for term in terms:
+            queryset = prefix_filter(queryset, term, fields)
+        return queryset
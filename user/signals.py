@@ -0,0 +1,27 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def drop_cached_user(sender, instance, **kwargs):
+    """
+    Profile edits, password changes and deactivation must not be served from the auth cache.
+    """
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def drop_cached_user_on_permission_change(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, CustomUser):
+        invalidate_cached_user(instance.pk)
+    elif pk_set:
+        # Changed from the group/permission side: pk_set holds the affected users.
+        for user_id in pk_set:
+            invalidate_cached_user(user_id)
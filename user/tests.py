@@ -1,3 +1,62 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from TBC_final_project.testing import RedisTestCase
+from .authentication import CachedJWTAuthentication, user_cache_key
+
+
+class CachedJWTAuthenticationTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('alice')
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self):
+        return self.authentication.get_user(self.token)
+
+    def test_cached_user_needs_no_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.email, user.is_active), (self.user.pk, self.user.email, True))
+
+    def test_saving_the_user_drops_the_entry(self):
+        self.authenticate()
+        self.user.username = "alicia"
+        self.user.save()
+
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.authenticate().username, "alicia")
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_inactive_entry_is_rejected(self):
+        self.authenticate()
+        entry = cache.get(user_cache_key(self.user.pk))
+        cache.set(user_cache_key(self.user.pk), {**entry, 'is_active': False})
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_falls_back_to_the_database_when_the_cache_is_down(self):
+        with mock.patch('user.authentication.cache.get', side_effect=RedisConnectionError("down")):
+            with self.assertLogs('user.authentication', 'WARNING'), self.assertNumQueries(1):
+                user = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deferred_fields_load_on_access(self):
+        self.authenticate()
+        user = self.authenticate()
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
@@ -17,6 +17,7 @@ class RegisterView(CreateAPIView):
 
 class FollowUserView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'follow'
     # serializer_class = UserSerializer
 
     def post(self, request, user_id):
@@ -45,8 +46,8 @@ class UserProfileView(RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        # Return the authenticated user's instance
-        return self.request.user
+        # The authenticated user's full row: request.user only has the auth cache's fields loaded.
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
 
 class FollowersListView(ListAPIView):